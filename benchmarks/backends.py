@@ -0,0 +1,96 @@
+"""Check that the DuckDB query backend matches the numpy one, and time both.
+
+    python -m benchmarks.backends [--members 100000] [--states 200]
+
+Random sidebar states (bracket, factions, search, member range) are run
+through both backends on the same snapshot. Row positions and the fuzzy
+flag must be identical; faction_stats frames must have the same columns,
+dtypes and integer values, with float columns equal to 1e-12 relative
+(DuckDB sums in parallel, so the last bit can differ). Exits non-zero on
+the first mismatch.
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_members
+from torn.aggregate import FACTION_STATS_AGG
+from torn.data import Snapshot
+from torn.query import DuckDBBackend, PandasBackend, duckdb
+from torn.snapshot import compact_members
+
+SEARCHES = ['', '', 'ka', 'an_', 'lord', 'zzzq', 'Kazr0']
+
+
+def random_state(members, rng):
+    brackets = members['Rank & Division'].cat.categories
+    factions = members['Faction Name'].cat.categories
+    low = int(rng.integers(1, 40))
+    return (
+        list(rng.choice(brackets, size=rng.integers(0, 3), replace=False)),
+        list(rng.choice(factions, size=rng.integers(0, 30), replace=False)),
+        SEARCHES[rng.integers(len(SEARCHES))],
+        (low, low + int(rng.integers(0, 100)))
+    )
+
+
+def compare(snapshot, backends, state):
+    results = []
+    for backend in backends:
+        rows, fuzzy = backend.filter_rows(snapshot.name_index, *state)
+        results.append((rows, fuzzy, backend.aggregate('Faction Name', FACTION_STATS_AGG, rows=rows)))
+
+    (rows, fuzzy, stats), (other_rows, other_fuzzy, other_stats) = results
+    if not np.array_equal(rows, other_rows) or fuzzy != other_fuzzy:
+        return 'row positions differ'
+    try:
+        pd.testing.assert_frame_equal(stats, other_stats, check_exact=False, rtol=1e-12)
+    except AssertionError as exc:
+        return str(exc)
+    return None
+
+
+def timed(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1e3
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--members', type=int, default=100000)
+    parser.add_argument('--states', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if duckdb is None:
+        sys.exit('duckdb is not installed')
+
+    snapshot = Snapshot(compact_members(make_members(args.members, seed=args.seed)))
+    members = snapshot.members
+    backends = [PandasBackend(members, snapshot.filter_index), DuckDBBackend(members, snapshot.filter_index)]
+
+    rng = np.random.default_rng(args.seed)
+    states = [random_state(members, rng) for _ in range(args.states)]
+    for state in states:
+        problem = compare(snapshot, backends, state)
+        if problem:
+            sys.exit(f'mismatch for {state}:\n{problem}')
+    print(f'{args.states} sidebar states identical on {args.members:,} members')
+
+    for backend in backends:
+        filter_ms = timed(lambda: [backend.filter_rows(snapshot.name_index, *s) for s in states[:20]]) / 20
+        all_rows = np.arange(len(members))
+        stats_ms = timed(lambda: backend.aggregate('Faction Name', FACTION_STATS_AGG, rows=all_rows))
+        print(f'{backend.name:<8} filters {filter_ms:8.2f} ms/state   faction_stats (all rows) {stats_ms:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Time the dashboard hot paths on synthetic rank-war data.
+
+    python -m benchmarks.run [--scales 5000 100000 1000000] [--repeat 5] [--json out.json]
+
+Each stage runs ``--repeat`` times for the timings and once more under
+tracemalloc for its peak allocation. Writing large xlsx files is slow, so
+the workbook-parse stage only runs for scales up to ``--xlsx-max`` rows.
+Everything is headless: figures are built but never rendered.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from benchmarks.synthetic import make_members
+from torn.aggregate import FACTION_STATS_AGG, aggregate, plain_labels
+from torn.data import Snapshot
+from torn.filters import filter_rows
+from torn.paging import selection_mask, top_rows
+from torn.ranks import MemberRanks
+from torn.snapshot import compact_members, read_workbook, write_snapshot
+from torn.styling import highlight_cells
+from torn.tornado import build_tornado
+
+COMPARISON_COLS = [
+    'Faction Name', 'Member Name', 'Rank & Division', 'attackswon', 'rankedwarhits',
+    'retals', 'elo', 'bs_estimate', 'bss_public', 'networth', 'xantaken', 'lsdtaken',
+    'statenhancersused', 'boostersused', 'refills', 'rankedwarringwins', 'useractivity'
+]
+TOP_KPIS = ['rankedwarhits', 'networth', 'bss_public', 'attackswon']
+
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'median_ms': statistics.median(times) * 1e3,
+        'min_ms': min(times) * 1e3,
+        'peak_mb': peak / 1e6
+    }
+
+
+def stages(n_members, workdir, xlsx_max):
+    raw = make_members(n_members)
+
+    if n_members <= xlsx_max:
+        xlsx_path = os.path.join(workdir, f'members-{n_members}.xlsx')
+        raw.to_excel(xlsx_path, sheet_name='RW_Factions', index=False)
+        yield 'workbook parse', lambda: read_workbook(xlsx_path)
+
+    members = compact_members(raw.copy())
+    snap_path = os.path.join(workdir, f'members-{n_members}.parquet')
+    write_snapshot(members, snap_path, os.path.join(workdir, 'unused'))
+    yield 'snapshot load', lambda: pd.read_parquet(snap_path)
+
+    yield 'snapshot build', lambda: Snapshot(members.copy())
+    snapshot = Snapshot(members)
+    df = snapshot.members
+
+    # A typical sidebar state: one bracket, a handful of factions, a short search
+    bracket = df['Rank & Division'].cat.categories[0]
+    factions = list(df.loc[df['Rank & Division'] == bracket, 'Faction Name'].unique()[:20])
+
+    def sidebar_filter():
+        rows, _ = filter_rows(
+            snapshot.filter_index, snapshot.name_index,
+            [bracket], factions, 'ka', (1, 100)
+        )
+        return df.take(rows)
+    yield 'sidebar filter', sidebar_filter
+
+    all_rows = np.arange(len(df))
+    yield 'faction_stats', lambda: aggregate(df, 'Faction Name', FACTION_STATS_AGG, rows=all_rows)
+
+    faction_stats = aggregate(df, 'Faction Name', FACTION_STATS_AGG, rows=all_rows)
+    comparison_df = faction_stats[COMPARISON_COLS]
+    ref_values = faction_stats.iloc[0]
+
+    def styling():
+        styles = highlight_cells(comparison_df, ref_values, skip_cols=['Faction Name', 'Rank & Division'])
+        # Streamlit serialises the computed styles, so include that work
+        return comparison_df.style.apply(lambda _: styles, axis=None)._compute()
+    yield 'highlight_cells', styling
+
+    # The Stats tab reads the top members of the filtered selection off each
+    # KPI's snapshot ordering (built on the first run, reused after)
+    filtered_rows, _ = filter_rows(
+        snapshot.filter_index, snapshot.name_index,
+        [bracket], factions, '', (1, 100)
+    )
+    selected = selection_mask(filtered_rows, len(df))
+
+    def top_members():
+        for kpi in TOP_KPIS:
+            top_idx = top_rows(snapshot.orderings.order(kpi, descending=True), selected, 10)
+            top = plain_labels(df.take(top_idx)[['Member Name', 'Faction Name', 'Rank & Division', kpi]])
+            px.bar(top[top[kpi].notna()], x='Member Name', y=kpi, color='Faction Name')
+    yield 'top-10 members', top_members
+
+    def percentile_ranks():
+        # Every KPI in every scope, as the warm-up builds them per snapshot
+        ranks = MemberRanks(df)
+        for kpi in ranks.kpis:
+            ranks.column(kpi)
+    yield 'percentile ranks', percentile_ranks
+
+    neighbour_factions = list(snapshot.faction_neighbours.row_of)[:20]
+    # Twenty lookups, as when paging through reference factions
+    yield 'faction neighbours', lambda: [
+        snapshot.faction_neighbours.nearest(name, 10) for name in neighbour_factions
+    ]
+
+    # Uncached: the page reuses figures per faction pair, this times a miss
+    matrix = snapshot.faction_matrix
+    left, right = snapshot.factions['Faction Name'].iloc[[0, -1]]
+    yield 'tornado figure', lambda: build_tornado(
+        matrix.row(left), matrix.row(right), left, right, matrix.metrics
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[5000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--xlsx-max', type=int, default=20000)
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_members in args.scales:
+            for stage, fn in stages(n_members, workdir, args.xlsx_max):
+                result = {'members': n_members, 'stage': stage, **measure(fn, args.repeat)}
+                results.append(result)
+                print(f"{n_members:>9,}  {stage:<16} {result['median_ms']:>10.2f} ms"
+                      f"  (min {result['min_ms']:.2f})  peak {result['peak_mb']:>8.1f} MB", flush=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
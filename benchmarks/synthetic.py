@@ -0,0 +1,55 @@
+"""Synthetic member tables in the RW_Factions layout."""
+import numpy as np
+import pandas as pd
+
+from torn.snapshot import PERSONALSTATS_COLS, WORKBOOK_COLS
+
+RANKS = [(3, 'Bronze'), (6, 'Silver'), (9, 'Gold'), (15, 'Platinum'), (18, 'Diamond')]
+SYLLABLES = ['ka', 'zu', 'mi', 'ro', 'ten', 'dra', 'vek', 'lo', 'shi', 'gar', 'nox', 'el', 'py', 'qua']
+
+
+def _names(rng, n, parts=3):
+    picks = rng.integers(0, len(SYLLABLES), size=(n, parts))
+    syllables = np.array(SYLLABLES, dtype=object)[picks]
+    return pd.Series(syllables.sum(axis=1)).str.capitalize() + pd.Series(rng.integers(0, 1000, n)).astype(str)
+
+
+def make_members(n_members, seed=0, faction_size=(20, 100)):
+    """Member table with ``n_members`` rows, grouped into factions of 20-100 members."""
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(*faction_size, size=n_members // faction_size[0] + 1)
+    sizes = sizes[:np.searchsorted(np.cumsum(sizes), n_members) + 1]
+    sizes[-1] -= sizes.sum() - n_members
+    n_factions = len(sizes)
+    faction = np.repeat(np.arange(n_factions), sizes)
+
+    rank = rng.integers(0, len(RANKS), n_factions)
+    faction_names = _names(rng, n_factions, parts=2) + ' ' + pd.Series(np.arange(n_factions)).astype(str)
+    df = pd.DataFrame({
+        'Faction ID': 1000 + faction,
+        'Faction Name': faction_names.to_numpy()[faction],
+        'Tag': faction_names.str[:3].str.upper().to_numpy()[faction],
+        'Number of Members': sizes[faction],
+        'Rank Level': np.array([level for level, _ in RANKS])[rank][faction],
+        'Rank Name': np.array([name for _, name in RANKS], dtype=object)[rank][faction],
+        'Division': rng.integers(0, 4, n_factions)[faction],
+        'Rank Position': rng.integers(0, 50, n_factions)[faction],
+        'Rank Wins': rng.integers(0, 200, n_factions)[faction],
+        'Member Name': _names(rng, n_members),
+        'Member ID': rng.permutation(n_members * 4)[:n_members] + 1,
+    })
+    # Personal stats are heavy-tailed; a lognormal per column is close enough
+    for i, col in enumerate(PERSONALSTATS_COLS):
+        scale = 10 ** (2 + i % 7)
+        df[col] = (rng.lognormal(0, 1.5, n_members) * scale).astype('int64')
+    df['networth'] = (rng.lognormal(0, 2, n_members) * 1e9).astype('int64')
+    df['elo'] = rng.integers(800, 3200, n_members)
+    df['awards'] = rng.integers(0, 800, n_members)
+    df['bs_estimate'] = rng.lognormal(20, 2, n_members).round()
+    df['bs_estimate_human'] = (df['bs_estimate'] / 1e6).round(2).astype(str) + 'm'
+    df['bss_public'] = rng.lognormal(9, 1.5, n_members).round()
+    # Like the real export, a few members have no battlestat estimate
+    missing = rng.random(n_members) < 0.05
+    df.loc[missing, ['bs_estimate', 'bs_estimate_human', 'bss_public']] = np.nan
+    df['last_updated'] = pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.integers(0, 30 * 86400, n_members), unit='s')
+    return df[WORKBOOK_COLS]
@@ -1,5 +1,11 @@
 import streamlit as st
 
+from torn import warmup
+
+# --- DATA WARM-UP ---
+# Builds the shared snapshot in the background while the About page is shown
+warmup.start()
+
 # --- PAGE SETUP ---
 about_page = st.Page(
     page="views/about.py",
@@ -37,6 +43,7 @@ pg = st.navigation(
 # --- SHARED ON ALL PAGES ---
 st.logo("assets/Ducky.png")
 st.sidebar.text("Made for fun by Maple ")
+st.sidebar.caption(warmup.status())
 
 
 # --- RUN NAVIGATION ---
@@ -0,0 +1,91 @@
+"""A local stand-in for the Torn API that replays recorded responses.
+
+    python -m tests.stub_api [--port 8080] [--recordings tests/recordings/torn_api.json]
+    python -m torn.ingest --key test --base-url http://127.0.0.1:8080 --out /tmp/members.parquet
+
+Recordings map ``<path>?selections=<selections>`` (the key is ignored) to a
+list of responses. Calls replay them in order and repeat the last one, so
+an error response followed by a good one exercises the client's retries.
+A response of the form ``{"http_status": 503}`` is served as that HTTP
+status with no body. Unknown resources get Torn's "Incorrect ID" error.
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+
+from aiohttp import web
+
+RECORDINGS_PATH = os.path.join(os.path.dirname(__file__), 'recordings', 'torn_api.json')
+
+
+def load_recordings(path=RECORDINGS_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def make_app(recordings, calls=None):
+    """aiohttp app serving ``recordings``; every call key is appended to ``calls``."""
+    served = {}
+
+    async def handle(request):
+        key = f"{request.path.strip('/')}?selections={request.query.get('selections', '')}"
+        if calls is not None:
+            calls.append(key)
+        responses = recordings.get(key)
+        if not responses:
+            return web.json_response({'error': {'code': 6, 'error': 'Incorrect ID'}})
+        index = served.get(key, 0)
+        served[key] = index + 1
+        response = responses[min(index, len(responses) - 1)]
+        if 'http_status' in response:
+            return web.Response(status=response['http_status'])
+        return web.json_response(response)
+
+    app = web.Application()
+    app.router.add_get('/{tail:.*}', handle)
+    return app
+
+
+class StubServer:
+    """The stub on a background thread, for tests that call the blocking CLI."""
+
+    def __init__(self, recordings=None, host='127.0.0.1'):
+        self.recordings = load_recordings() if recordings is None else recordings
+        self.host = host
+        self.calls = []
+        self.url = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='torn-stub-api', daemon=True)
+        self._runner = None
+
+    async def _start(self):
+        self._runner = web.AppRunner(make_app(self.recordings, self.calls))
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f'http://{self.host}:{port}'
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve recorded Torn API responses.')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--recordings', default=RECORDINGS_PATH)
+    args = parser.parse_args(argv)
+    web.run_app(make_app(load_recordings(args.recordings)), host='127.0.0.1', port=args.port)
+
+
+if __name__ == '__main__':
+    main()
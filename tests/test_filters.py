@@ -0,0 +1,34 @@
+"""Sidebar filter indexes against the pandas filters they replaced."""
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_members
+from torn.data import prepare_members
+from torn.filters import FilterIndex
+from torn.snapshot import compact_members
+
+
+@pytest.fixture(scope='module')
+def members():
+    members = prepare_members(compact_members(make_members(5000, seed=4)))
+    # The export has members without a name; they do not count towards faction size
+    members.loc[members.index[::7], 'Member Name'] = None
+    return members
+
+
+def test_faction_sizes_count_named_members(members):
+    expected = members.groupby('Faction Name', observed=True)['Member Name'].count()
+
+    assert np.array_equal(FilterIndex(members).faction_sizes, expected.to_numpy())
+
+
+@pytest.mark.parametrize('member_range', [(1, 10), (5, 20), (0, 3), (15, 100)])
+def test_member_range_matches_groupby(members, member_range):
+    index = FilterIndex(members)
+    rows = np.flatnonzero(members['Rank & Division'].isin(members['Rank & Division'].cat.categories[:3]))
+    selected = members.take(rows)
+    counts = selected.groupby('Faction Name', observed=True)['Member Name'].count()
+    in_range = counts[(counts >= member_range[0]) & (counts <= member_range[1])].index
+
+    expected = rows[selected['Faction Name'].isin(in_range).to_numpy()]
+    assert np.array_equal(index.limit_member_range(rows, *member_range), expected)
@@ -0,0 +1,47 @@
+"""Trend series from the append-only member history."""
+import pytest
+
+from benchmarks.synthetic import make_members
+from torn.history import append_snapshot, faction_history
+from torn.snapshot import compact_members
+
+
+def test_versions_with_the_same_newest_update_stay_separate(tmp_path):
+    members = compact_members(make_members(2000, seed=3))
+    faction = members['Faction Name'].iloc[0]
+    # A re-export after one member left: same newest last_updated, new content
+    newest = members['last_updated'].idxmax()
+    leaver = members.index[(members['Faction Name'] == faction) & (members.index != newest)][0]
+    reexport = members.drop(index=leaver)
+
+    assert append_snapshot(members, 'v1', history_dir=tmp_path)
+    assert append_snapshot(reexport, 'v2', history_dir=tmp_path)
+    assert append_snapshot(reexport, 'v2', history_dir=tmp_path) is None
+
+    trend = faction_history(faction, ['bs_estimate'], history_dir=tmp_path)
+    expected = [
+        members.loc[members['Faction Name'] == faction, 'bs_estimate'].sum(),
+        reexport.loc[reexport['Faction Name'] == faction, 'bs_estimate'].sum(),
+    ]
+    assert trend['taken_at'].is_unique
+    assert trend['bs_estimate'].tolist() == pytest.approx(expected)
+
+
+def test_column_types_can_change_between_versions(tmp_path):
+    members = compact_members(make_members(2000, seed=5))
+    faction = members['Faction Name'].iloc[0]
+    # A later export where one stat has a fractional value and a text column is empty
+    later = members.assign(xantaken=members['xantaken'].astype('float64'), Tag=None)
+    later.loc[later.index[0], 'xantaken'] = 1.5
+    later = compact_members(later)
+    assert members['xantaken'].dtype.kind == 'i' and later['xantaken'].dtype.kind == 'f'
+
+    assert append_snapshot(members, 'v1', history_dir=tmp_path)
+    assert append_snapshot(later, 'v2', history_dir=tmp_path)
+
+    trend = faction_history(faction, ['xantaken'], history_dir=tmp_path)
+    expected = [
+        members.loc[members['Faction Name'] == faction, 'xantaken'].sum(),
+        later.loc[later['Faction Name'] == faction, 'xantaken'].sum(),
+    ]
+    assert trend['xantaken'].tolist() == pytest.approx(expected)
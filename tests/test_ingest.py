@@ -0,0 +1,125 @@
+"""``torn.ingest`` against the stub server and its recorded API responses."""
+import asyncio
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tests.stub_api import StubServer, load_recordings
+from torn.ingest import ESTIMATE_COLS, ingest, main
+from torn.snapshot import WORKBOOK_COLS
+
+NEW_MEMBER = 3999001
+
+
+@pytest.fixture
+def stub():
+    server = StubServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def estimates():
+    return pd.DataFrame({
+        'Member ID': [165213, 284245, 970642],
+        'bs_estimate': [2.928696e9, 4.884714e9, 3.916928e7],
+        'bs_estimate_human': ['2.93b', '4.88b', '39.2m'],
+        'bss_public': [106133.0, 137067.0, 12274.0],
+    })
+
+
+def _user_calls(stub):
+    return [call for call in stub.calls if call.startswith('user/')]
+
+
+def _profile(member_id):
+    return f'user/{member_id}?selections=profile,personalstats'
+
+
+def test_ingest_builds_workbook_rows(stub, estimates):
+    df = asyncio.run(ingest(['test'], base_url=stub.url, estimates=estimates))
+
+    assert list(df.columns) == WORKBOOK_COLS
+    # Both ranked-war factions, every roster member (one retried after error 5)
+    assert sorted(df['Faction ID'].unique()) == [12721, 47615]
+    assert len(df) == 7
+    assert _user_calls(stub).count('user/284245?selections=profile,personalstats') == 2
+
+    recorded = load_recordings()['user/541153?selections=profile,personalstats'][0]
+    row = df.set_index('Member ID').loc[541153]
+    assert row['xantaken'] == recorded['personalstats']['xantaken']
+    assert row['Faction Name'] == 'Dominion of Crime'
+    assert row['Number of Members'] == 4
+
+    by_id = df.set_index('Member ID')
+    assert by_id.loc[284245, 'bs_estimate'] == 4.884714e9
+    assert by_id.loc[970642, 'bs_estimate_human'] == '39.2m'
+    assert by_id.loc[[NEW_MEMBER, 541153], ESTIMATE_COLS].isna().all().all()
+
+
+def test_refresh_refetches_stale_members_only(stub, estimates):
+    current = asyncio.run(ingest(['test'], base_url=stub.url, estimates=estimates))
+    current.loc[current['Member ID'] == 165213, 'last_updated'] = pd.Timestamp('2000-01-01')
+    stub.calls.clear()
+
+    df = asyncio.run(ingest(['test'], base_url=stub.url, current=current, max_age=pd.Timedelta(hours=24)))
+
+    assert _user_calls(stub) == ['user/165213?selections=profile,personalstats']
+    assert len(df) == len(current)
+    # Estimates are not in the API response; the re-fetched member keeps theirs
+    by_id = df.set_index('Member ID')
+    assert by_id.loc[165213, 'bs_estimate'] == 2.928696e9
+    assert by_id.loc[165213, 'last_updated'] > pd.Timestamp('2000-01-01')
+
+
+def test_refresh_keeps_rows_that_fail_to_refetch(estimates):
+    recordings = load_recordings()
+    server = StubServer(recordings).start()
+    try:
+        current = asyncio.run(ingest(['test'], base_url=server.url, estimates=estimates))
+        current.loc[current['Member ID'] == 165213, 'last_updated'] = pd.Timestamp('2000-01-01')
+        # The stale member's profile now fails, and so does a whole faction
+        recordings[_profile(165213)] = [{'error': {'code': 6, 'error': 'Incorrect ID'}}]
+        recordings['faction/47615?selections=basic'] = [{'http_status': 404}]
+        df = asyncio.run(ingest(['test'], base_url=server.url, current=current, max_age=pd.Timedelta(hours=24)))
+    finally:
+        server.stop()
+
+    assert sorted(df['Member ID']) == sorted(current['Member ID'])
+    by_id = df.set_index('Member ID')
+    assert by_id.loc[165213, 'last_updated'] == pd.Timestamp('2000-01-01')
+    assert by_id.loc[165213, 'bs_estimate'] == 2.928696e9
+    lost_faction = current[current['Faction ID'] == 47615].set_index('Member ID')
+    pd.testing.assert_frame_equal(by_id.loc[lost_faction.index], lost_faction)
+
+
+def test_cli_writes_output_with_estimates(stub, estimates, tmp_path):
+    estimates_path = tmp_path / 'estimates.parquet'
+    estimates.to_parquet(estimates_path, index=False)
+    out = tmp_path / 'ingest' / 'members.parquet'
+
+    main(['--key', 'test', '--base-url', stub.url, '--out', str(out), '--estimates', str(estimates_path)])
+
+    df = pd.read_parquet(out)
+    assert len(df) == 7
+    assert np.isclose(df.loc[df['Member ID'] == 165213, 'bs_estimate'].iloc[0], 2.928696e9)
+
+
+def test_http_errors_are_retried_and_failures_reported(estimates, caplog):
+    recordings = load_recordings()
+    # One passing 503, and a member the server never returns
+    recordings[_profile(541153)] = [{'http_status': 503}, *recordings[_profile(541153)]]
+    recordings[_profile(970642)] = [{'http_status': 404}]
+    server = StubServer(recordings).start()
+    try:
+        with caplog.at_level(logging.WARNING, logger='torn.ingest'):
+            df = asyncio.run(ingest(['test'], base_url=server.url, estimates=estimates))
+    finally:
+        server.stop()
+
+    assert _user_calls(server).count(_profile(541153)) == 2
+    assert _user_calls(server).count(_profile(970642)) == 1
+    assert sorted(df['Member ID']) == sorted([165213, 284245, 541153, 1013891, 2209507, NEW_MEMBER])
+    assert '0 factions and 1 members could not be fetched' in caplog.text
@@ -0,0 +1,31 @@
+"""Battlestats model fitting on synthetic members."""
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_members
+from torn.predict import TrainingDataError, load_or_train, train_model
+
+
+def test_train_model_predicts_every_member():
+    members = make_members(1000, seed=5)
+    model = train_model(members)
+    predicted = model.predict(members)
+    assert predicted.shape == (1000,)
+    assert np.isfinite(predicted).all()
+
+
+def test_no_known_estimates_is_a_clear_error():
+    members = make_members(200, seed=5).assign(bs_estimate=np.nan)
+    with pytest.raises(TrainingDataError, match='0 members have a bs_estimate'):
+        train_model(members)
+
+
+def test_models_are_kept_per_sheet(tmp_path):
+    # Sheets of one workbook share its source key
+    war, other = make_members(300, seed=1), make_members(300, seed=2)
+    war_model = load_or_train(war, 'key', 'War', model_dir=str(tmp_path))
+    load_or_train(other, 'key', 'Other', model_dir=str(tmp_path))
+
+    assert len(list(tmp_path.iterdir())) == 2
+    reloaded = load_or_train(other, 'key', 'War', model_dir=str(tmp_path))
+    assert np.array_equal(reloaded.predict(war), war_model.predict(war))
@@ -0,0 +1,42 @@
+"""The DuckDB query backend must return exactly what the numpy path returns."""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('duckdb')
+
+from benchmarks.backends import compare, random_state
+from benchmarks.synthetic import make_members
+from torn.aggregate import FACTION_STATS_AGG
+from torn.data import Snapshot
+from torn.query import DuckDBBackend, PandasBackend
+from torn.snapshot import compact_members
+
+
+@pytest.fixture(scope='module')
+def snapshot():
+    members = compact_members(make_members(20000, seed=11))
+    # Unnamed members do not count towards faction size in either backend
+    members.loc[members.index[::9], 'Member Name'] = None
+    return Snapshot(members)
+
+
+@pytest.fixture(scope='module')
+def backends(snapshot):
+    members = snapshot.members
+    return [PandasBackend(members, snapshot.filter_index), DuckDBBackend(members, snapshot.filter_index)]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_sidebar_states_match(snapshot, backends, seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(40):
+        state = random_state(snapshot.members, rng)
+        assert compare(snapshot, backends, state) is None, state
+
+
+def test_whole_table_and_empty_selection_match(snapshot, backends):
+    for rows in [None, np.arange(len(snapshot.members)), np.empty(0, dtype='int64')]:
+        frames = [backend.aggregate('Faction Name', FACTION_STATS_AGG, rows=rows) for backend in backends]
+        # DuckDB sums in parallel, so floats may differ in the last bit
+        pd.testing.assert_frame_equal(frames[0], frames[1], check_exact=False, rtol=1e-12)
@@ -0,0 +1,62 @@
+"""The incremental faction refresh must equal a full re-aggregation."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_members
+from torn.data import Snapshot, aggregate_factions, prepare_members
+from torn.snapshot import compact_members
+
+
+@pytest.fixture
+def members():
+    df = compact_members(make_members(3000, seed=7))
+    # Like the real export, some rows have no last_updated at all
+    df.loc[df.index[::20], 'last_updated'] = pd.NaT
+    return df
+
+
+def _estimate_without_last_updated(df):
+    df.loc[df['last_updated'].isna(), 'bs_estimate'] = 5e9
+    return df
+
+
+def _estimate_only(df):
+    # Third-party estimates move without last_updated
+    df.loc[df.index[::150], 'bss_public'] = 1.0
+    return df
+
+
+def _stat_without_last_updated(df):
+    df.loc[df['last_updated'].isna(), 'xantaken'] += 7
+    return df
+
+
+def _member_moves_faction(df):
+    df = df.copy()
+    target = df.iloc[-1]
+    for col in ['Faction ID', 'Faction Name', 'Tag', 'Rank Level', 'Rank Name', 'Division']:
+        df.loc[df.index[0], col] = target[col]
+    return df
+
+
+def _members_leave_and_join(df):
+    joined = df.iloc[:5].assign(**{'Member ID': df['Member ID'].max() + np.arange(1, 6)})
+    return pd.concat([df.iloc[40:], joined], ignore_index=True)
+
+
+def _shuffled(df):
+    return df.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('change', [
+    _estimate_without_last_updated, _estimate_only, _stat_without_last_updated,
+    _member_moves_faction, _members_leave_and_join, _shuffled,
+])
+def test_refresh_matches_full_aggregate(members, change):
+    previous = Snapshot(members.copy())
+    incoming = change(members.copy())
+
+    refreshed = Snapshot(incoming.copy(), previous=previous)._factions
+    full = aggregate_factions(prepare_members(incoming.copy()))
+    pd.testing.assert_frame_equal(refreshed, full, check_exact=True)
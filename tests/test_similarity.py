@@ -0,0 +1,27 @@
+"""``torn.similarity`` neighbour selection."""
+import numpy as np
+import pandas as pd
+
+from torn.similarity import FactionNeighbours
+
+
+def test_nearest_breaks_ties_by_row():
+    # One query faction, then a long run of factions at the same distance
+    # crossing the k-th boundary, then farther ones
+    values = [0.0] + [1.0] * 50 + [5.0] * 10
+    stats = pd.DataFrame({'Faction Name': [f'F{i}' for i in range(len(values))], 'metric': values})
+    neighbours = FactionNeighbours(stats, metrics=['metric'])
+
+    result = neighbours.nearest('F0', k=10)
+
+    assert list(result['Faction Name']) == [f'F{i}' for i in range(1, 11)]
+    assert np.all(np.diff(result['Distance']) >= 0)
+
+
+def test_nearest_respects_candidates():
+    stats = pd.DataFrame({'Faction Name': ['A', 'B', 'C', 'D'], 'metric': [1.0, 2.0, 3.0, 4.0]})
+    neighbours = FactionNeighbours(stats, metrics=['metric'])
+
+    result = neighbours.nearest('A', k=5, candidates=['D', 'C', 'A', 'missing'])
+
+    assert list(result['Faction Name']) == ['C', 'D']
@@ -0,0 +1,73 @@
+"""Workbook snapshots: cache files and the streaming workbook reader."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_members
+from torn.snapshot import (
+    NUMERIC_COLS, SHEET_COL, SNAPSHOT_COLS, SNAPSHOT_VERSION, TEXT_COLS, compact_members, read_workbook,
+    write_snapshot
+)
+
+CHUNK_ROWS = 50
+
+
+@pytest.fixture(scope='module')
+def workbook(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('workbook') / 'RW_Factions.xlsx')
+    war = make_members(300, seed=6)
+    # Blanks inside one chunk only: that chunk of an integer column comes back
+    # as float with gaps, and a text column has empty cells
+    war.loc[60:79, ['xantaken', 'Tag', 'Member Name']] = np.nan
+    war.loc[120:130, 'networth'] = 'n/a'
+    # A second sheet without one of the columns
+    other = make_members(120, seed=7).drop(columns=['elo'])
+    with pd.ExcelWriter(path) as writer:
+        war.to_excel(writer, sheet_name='War', index=False)
+        other.to_excel(writer, sheet_name='Other', index=False)
+    return path
+
+
+def _read_excel(path, sheets):
+    # The reader read_workbook replaced: read_excel plus the old coercion
+    frames = [pd.read_excel(path, sheet_name=sheet) for sheet in sheets]
+    if len(sheets) > 1:
+        frames = [frame.assign(**{SHEET_COL: sheet}) for frame, sheet in zip(frames, sheets)]
+    df = pd.concat(frames, ignore_index=True)
+    df = df[[col for col in df.columns if col in SNAPSHOT_COLS or col == SHEET_COL]]
+    for col in NUMERIC_COLS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    for col in TEXT_COLS:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    if SHEET_COL in df.columns:
+        df[SHEET_COL] = df[SHEET_COL].astype('category')
+    return compact_members(df)
+
+
+def test_write_snapshot_keeps_sheets_with_a_longer_name(tmp_path):
+    members = compact_members(make_members(50, seed=1))
+    old = tmp_path / f'RW-War-v{SNAPSHOT_VERSION - 1}-0123456789abcdef.parquet'
+    other_sheet = tmp_path / f'RW-War-2-v{SNAPSHOT_VERSION}-0123456789abcdef.parquet'
+    for path in (old, other_sheet):
+        path.write_bytes(b'')
+    new = str(tmp_path / f'RW-War-v{SNAPSHOT_VERSION}-fedcba9876543210.parquet')
+
+    write_snapshot(members, new, str(tmp_path / 'RW-War'))
+
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(new), other_sheet.name])
+
+
+def test_read_workbook_matches_read_excel(workbook):
+    df = read_workbook(workbook, 'War', chunk_rows=CHUNK_ROWS)
+
+    pd.testing.assert_frame_equal(df, _read_excel(workbook, ['War']), check_exact=True)
+    assert df['xantaken'].dtype == 'float32' and df['Tag'].dtype == 'category'
+
+
+def test_read_workbook_joins_sheets_with_different_columns(workbook):
+    df = read_workbook(workbook, None, chunk_rows=CHUNK_ROWS)
+
+    pd.testing.assert_frame_equal(df, _read_excel(workbook, ['War', 'Other']), check_exact=True)
+    assert df.loc[df[SHEET_COL] == 'Other', 'elo'].isna().all()
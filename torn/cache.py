@@ -0,0 +1,56 @@
+"""Bounded LRU cache for per-filter-state results.
+
+Each snapshot owns one cache, so entries are implicitly versioned: a new
+workbook gets a fresh cache and old results are dropped with the old
+snapshot. The cache is shared by every session in the process, so popular
+sidebar states are only computed once.
+"""
+import threading
+from collections import OrderedDict
+
+
+def filter_key(rank_divisions, factions, search, member_range):
+    # Same selection in a different order or case is the same view
+    return (
+        tuple(sorted(str(r) for r in rank_divisions or ())),
+        tuple(sorted(str(f) for f in factions or ())),
+        (search or '').strip().lower(),
+        tuple(int(m) for m in member_range)
+    )
+
+
+class ResultCache:
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Computed outside the lock; two sessions racing on the same new key
+        # both compute it and the second result wins, which is harmless
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
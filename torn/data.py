@@ -0,0 +1,183 @@
+"""One shared copy of the member table and its faction aggregate.
+
+Every page goes through ``get_snapshot()`` so the workbook is parsed and
+aggregated once per process, not once per page. Copy-on-write is switched on
+so the frames handed to pages behave as read-only views: a page that adds or
+overwrites a column only ever changes its own copy.
+
+New exports are picked up by a background ``SnapshotRefresher`` and swapped
+in whole, so no rerun waits on a rebuild.
+"""
+import logging
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from torn.aggregate import FACTION_AGG, FACTION_GROUP_COLS, FACTION_STATS_AGG, aggregate, plain_labels
+from torn.cache import ResultCache
+from torn.filters import FilterIndex
+from torn.history import append_snapshot
+from torn.paging import MemberOrderings
+from torn.query import make_backend
+from torn.ranks import MemberRanks
+from torn.refresh import refresh_factions, row_hashes
+from torn.search import NameIndex
+from torn.similarity import FactionNeighbours
+from torn.snapshot import SHEET_NAME, SOURCE_PATH, load_members, source_key
+from torn.tornado import FactionMatrix
+
+pd.set_option('mode.copy_on_write', True)
+
+log = logging.getLogger(__name__)
+
+# Seconds between checks of the workbook for a new export
+REFRESH_INTERVAL = 30
+
+def prepare_members(df):
+    # Combine Rank Name and Division once for every page
+    rank_division = df['Rank Name'].astype(str) + ' ' + df['Division'].astype(str)
+    df['Rank & Division'] = rank_division.astype('category')
+    return df
+
+
+def aggregate_factions(members):
+    return plain_labels(aggregate(members, FACTION_GROUP_COLS, FACTION_AGG))
+
+
+class Snapshot:
+    def __init__(self, members, key=None, previous=None, version=0):
+        self.key = key
+        self.version = version
+        self._members = prepare_members(members)
+        # Kept so the next workbook version can be diffed against this one
+        self.member_hashes = row_hashes(self._members)
+        if previous is None:
+            self._factions = aggregate_factions(self._members)
+        else:
+            # Only the factions whose members changed are re-aggregated
+            self._factions = refresh_factions(
+                previous._factions, previous._members, self._members,
+                previous.member_hashes, self.member_hashes
+            )
+        # Dense faction x metric block for the tornado comparison
+        self.faction_matrix = FactionMatrix(self._factions)
+        # Normalised faction_stats of every faction for the similarity search
+        self.faction_neighbours = FactionNeighbours(
+            plain_labels(aggregate(self._members, 'Faction Name', FACTION_STATS_AGG))
+        )
+        self.filter_index = FilterIndex(self._members)
+        # Filters and faction_stats for the member dashboard (numpy, or DuckDB
+        # when TORN_QUERY_BACKEND=duckdb)
+        self.query = make_backend(self._members, self.filter_index)
+        self.name_index = NameIndex(self._members['Member Name'])
+        # Sort orders for the paged member table, built per column on first use
+        self.orderings = MemberOrderings(self._members)
+        # Per-KPI ranks and percentiles (overall, per faction, per bracket),
+        # built per KPI on first use
+        self.ranks = MemberRanks(self._members)
+        # Derived views per sidebar state, shared by every session on this snapshot
+        self.view_cache = ResultCache(maxsize=128)
+
+    @property
+    def members(self):
+        # Shallow copy: shares memory until the caller writes to it
+        return self._members.copy(deep=False)
+
+    @property
+    def factions(self):
+        return self._factions.copy(deep=False)
+
+
+def build_snapshot(path=SOURCE_PATH, sheet_name=SHEET_NAME, previous=None, version=0):
+    return Snapshot(load_members(path, sheet_name), key=source_key(path), previous=previous, version=version)
+
+
+class SnapshotRefresher:
+    """Owns the current snapshot and rebuilds it off the request path.
+
+    A daemon thread checks the workbook every ``interval`` seconds (a stat
+    call; the content is only re-hashed when size or mtime move). When the
+    content changed, the next snapshot is built in the background, refreshed
+    against the current one, and published with one reference assignment
+    under a new version number. Reruns that already hold the old snapshot
+    finish on it, so no page ever sees half of each.
+    """
+
+    def __init__(self, path=SOURCE_PATH, sheet_name=SHEET_NAME, interval=REFRESH_INTERVAL):
+        self.path = path
+        self.sheet_name = sheet_name
+        self.interval = interval
+        self.current = None
+        self.last_error = None
+        self._build_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def version(self):
+        current = self.current
+        return current.version if current is not None else 0
+
+    def refresh(self):
+        """Build and swap in a new snapshot if the workbook changed; True if it did."""
+        with self._build_lock:
+            current = self.current
+            key = source_key(self.path)
+            if current is not None and current.key == key:
+                return False
+            snapshot = build_snapshot(self.path, self.sheet_name, previous=current, version=self.version + 1)
+            try:
+                # Each workbook version is recorded once for the trend charts
+                append_snapshot(snapshot._members, key)
+            except OSError:
+                pass
+            self.current = snapshot
+            return True
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='snapshot-refresher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as exc:
+                # A workbook caught mid-copy fails to parse; the current
+                # snapshot stays live and the next tick tries again
+                if str(exc) != str(self.last_error):
+                    log.warning('snapshot refresh failed: %s', exc)
+                self.last_error = exc
+
+
+# One refresher per server process, shared by every session and the warm-up
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def get_refresher():
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None:
+            refresher = SnapshotRefresher()
+            # The first load of a process is the only build anyone waits for
+            refresher.refresh()
+            refresher.start()
+            _refresher = refresher
+    return _refresher
+
+
+def get_snapshot():
+    # The latest published snapshot; a page should call this once per rerun
+    # and use that object throughout
+    if _refresher is None:
+        # Cold process (or the warm-up is still building): wait for it here
+        with st.spinner("Loading faction data..."):
+            return get_refresher().current
+    return _refresher.current
@@ -0,0 +1,100 @@
+"""Per-snapshot row indexes behind the sidebar filters.
+
+Rows are grouped by the integer codes of the categorical filter columns, so
+selecting factions or rank divisions is a lookup of precomputed position
+ranges instead of an ``isin`` scan over the whole member table. Every
+selection is returned as a sorted array of row positions that the page turns
+into a frame with a single ``take``.
+"""
+import numpy as np
+
+
+class CodeIndex:
+    """Sorted row positions for each category code of one column."""
+
+    def __init__(self, column):
+        self.categories = column.cat.categories
+        self.codes = column.cat.codes.to_numpy()
+        # Stable sort keeps positions ascending inside each code's slice
+        self.order = np.argsort(self.codes, kind='stable')
+        # NaN labels have code -1; they sort first and are skipped by the offsets
+        counts = np.bincount(self.codes[self.codes >= 0], minlength=len(self.categories))
+        self.sizes = counts
+        self.starts = len(self.codes) - counts.sum() + np.concatenate(([0], np.cumsum(counts)))
+
+    def lookup(self, labels):
+        codes = self.categories.get_indexer(list(labels))
+        return codes[codes >= 0]
+
+    def rows_for(self, labels):
+        slices = [self.order[self.starts[c]:self.starts[c + 1]] for c in self.lookup(labels)]
+        if not slices:
+            return np.empty(0, dtype=self.order.dtype)
+        return np.sort(np.concatenate(slices))
+
+
+class FilterIndex:
+    def __init__(self, members):
+        self.n_rows = len(members)
+        self.factions = CodeIndex(members['Faction Name'])
+        self.rank_divisions = CodeIndex(members['Rank & Division'])
+        # Factions are sized by named members, like the 'Member Name' count
+        # in the faction aggregate
+        self.named = members['Member Name'].notna().to_numpy()
+
+    def named_counts(self, rows=None):
+        """Named members per faction code, within ``rows`` when given."""
+        codes, named = self.factions.codes, self.named
+        if rows is not None:
+            codes, named = codes[rows], named[rows]
+        return np.bincount(codes[named & (codes >= 0)], minlength=len(self.factions.categories))
+
+    @property
+    def faction_sizes(self):
+        # Every faction with rows, including any whose members are all unnamed
+        return self.named_counts()[self.factions.sizes > 0]
+
+    def select(self, rank_divisions=None, factions=None):
+        rows = None
+        if rank_divisions:
+            rows = self.rank_divisions.rows_for(rank_divisions)
+        if factions:
+            faction_rows = self.factions.rows_for(factions)
+            rows = faction_rows if rows is None else np.intersect1d(rows, faction_rows, assume_unique=True)
+        if rows is None:
+            rows = np.arange(self.n_rows)
+        return rows
+
+    def limit_member_range(self, rows, min_members, max_members):
+        # Faction sizes are counted inside the current selection, like the old groupby
+        counts = self.named_counts(rows)
+        codes = self.factions.codes[rows]
+        in_range = (counts >= min_members) & (counts <= max_members)
+        # Trailing False so members without a faction (code -1) are always dropped
+        in_range = np.append(in_range, False)
+        return rows[in_range[codes]]
+
+
+def search_rows(name_index, search):
+    """Rows matching the player search (None when empty) and whether they are close matches."""
+    if not search:
+        return None, False
+    # Trigram index; falls back to close matches on typos
+    matches = name_index.search(search)
+    if len(matches):
+        return matches, False
+    return name_index.search(search, fuzzy=True), True
+
+
+def filter_rows(filter_index, name_index, rank_divisions, factions, search, member_range):
+    """Row positions left by the sidebar filters, and whether search fell back to close matches."""
+    # Apply Rank & Division and faction filters
+    rows = filter_index.select(rank_divisions, factions)
+
+    # Apply player name filter
+    matches, fuzzy = search_rows(name_index, search)
+    if matches is not None:
+        rows = np.intersect1d(rows, matches, assume_unique=True)
+
+    # Apply member count filter
+    return filter_index.limit_member_range(rows, *member_range), fuzzy
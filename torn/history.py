@@ -0,0 +1,129 @@
+"""Append-only history of member snapshots for trend charts.
+
+Every workbook version is appended once as an uncompressed Arrow IPC file
+under a ``date=YYYY-MM-DD`` partition, so readers memory-map the files and
+only touch the partitions and columns a query asks for:
+
+    history/date=2025-07-20/members-20250720T221827-ae341203a980fab6.arrow
+
+Files are never rewritten; a version already on disk is skipped. Every
+version gets its own ``taken_at``, so two exports with the same newest
+member update (a re-export after someone left) stay separate points in the
+trend instead of being added together.
+
+    python -m torn.history append      # record the current workbook
+    python -m torn.history show "Faction" bs_estimate elo
+"""
+import argparse
+import glob
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from torn.aggregate import FACTION_AGG, aggregate, plain_labels
+
+HISTORY_DIR = 'history'
+# Text columns with no use in a time series
+SKIP_COLS = ['bs_estimate_human']
+# Numeric columns kept as integers; every other number is stored as float64
+ID_COLS = ['Faction ID', 'Member ID']
+
+
+def _widen(members):
+    # One type per column in every file, since the dataset takes its schema
+    # from the first one. Compaction picks types per snapshot (a stat can be
+    # int8 in one export and fractional in the next), so only IDs stay integers
+    df = plain_labels(members.drop(columns=SKIP_COLS, errors='ignore'))
+    types = {col: 'Int64' if col in ID_COLS else 'float64' for col in df.select_dtypes('number').columns}
+    return df.astype(types)
+
+
+def append_snapshot(members, key, taken_at=None, history_dir=HISTORY_DIR):
+    """Append one member snapshot; returns its path, or None if already recorded."""
+    if glob.glob(os.path.join(glob.escape(history_dir), 'date=*', f'members-*-{key}.arrow')):
+        return None
+    if taken_at is None:
+        # The newest member update is the closest thing to an export time
+        taken_at = members['last_updated'].max()
+        if pd.isna(taken_at):
+            taken_at = pd.Timestamp.now()
+    taken_at = pd.Timestamp(taken_at).floor('s')
+    while glob.glob(os.path.join(
+        glob.escape(history_dir), f'date={taken_at:%Y-%m-%d}', f'members-{taken_at:%Y%m%dT%H%M%S}-*.arrow'
+    )):
+        taken_at += pd.Timedelta(seconds=1)
+
+    df = _widen(members)
+    df.insert(0, 'taken_at', taken_at)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # A text column that is empty in this snapshot would be typed null
+    schema = pa.schema(
+        [pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in table.schema],
+        metadata=table.schema.metadata
+    )
+    table = table.cast(schema)
+
+    partition = os.path.join(history_dir, f'date={taken_at:%Y-%m-%d}')
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, f'members-{taken_at:%Y%m%dT%H%M%S}-{key}.arrow')
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def history_dataset(history_dir=HISTORY_DIR):
+    return ds.dataset(
+        history_dir,
+        format='ipc',
+        partitioning='hive',
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+        exclude_invalid_files=True
+    )
+
+
+def read_history(columns, filter=None, history_dir=HISTORY_DIR):
+    if not glob.glob(os.path.join(glob.escape(history_dir), 'date=*', '*.arrow')):
+        return pd.DataFrame(columns=columns)
+    return history_dataset(history_dir).to_table(columns=columns, filter=filter).to_pandas()
+
+
+def faction_history(factions, metrics, start=None, end=None, history_dir=HISTORY_DIR):
+    """Per-snapshot faction totals/means of ``metrics``, one row per (taken_at, faction).
+
+    Metrics are aggregated the same way as the faction table (sums, or means
+    for ratings); date bounds prune whole partitions before any file is read.
+    """
+    factions = [factions] if isinstance(factions, str) else list(factions)
+    condition = ds.field('Faction Name').isin(factions)
+    if start is not None:
+        condition &= ds.field('date') >= pd.Timestamp(start).strftime('%Y-%m-%d')
+    if end is not None:
+        condition &= ds.field('date') <= pd.Timestamp(end).strftime('%Y-%m-%d')
+
+    members = read_history(['taken_at', 'Faction Name', *metrics], condition, history_dir)
+    spec = {metric: FACTION_AGG.get(metric, 'sum') for metric in metrics}
+    series = aggregate(members, ['taken_at', 'Faction Name'], spec)
+    return series.sort_values(['taken_at', 'Faction Name']).reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    from torn.snapshot import load_members, source_key
+
+    parser = argparse.ArgumentParser(description='Record or query the member snapshot history.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('append', help='Append the current workbook to the history')
+    show = commands.add_parser('show', help='Print a faction time series')
+    show.add_argument('faction')
+    show.add_argument('metrics', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'append':
+        path = append_snapshot(load_members(), source_key())
+        print(path or 'Current workbook is already in the history')
+    else:
+        print(faction_history(args.faction, args.metrics).to_string(index=False))
@@ -0,0 +1,327 @@
+"""Pull rank-war factions and member personal stats from the Torn API.
+
+Replaces the hand-exported workbook: faction and member requests run
+concurrently on asyncio over one bounded aiohttp connection pool, and every
+API key gets its own sliding-window rate limit (Torn allows 100 calls a
+minute per key). Rate limits, server errors and dropped connections are
+retried with backoff; whatever still fails is logged and counted at the
+end. The result is written in the RW_Factions sheet layout, so the
+dashboards and ``torn.snapshot`` consume it unchanged.
+
+    python -m torn.ingest --key KEY [--key KEY2 ...] [--faction ID ...] [--out PATH]
+
+The output goes to ``.cache/ingest/`` unless ``--out`` says otherwise; pass
+``--out assets/RW_Factions.xlsx`` to replace the bundled workbook. Battlestat
+estimates come from third-party scouting, not the API, so they are looked up
+by Member ID in ``--estimates`` (the bundled workbook by default).
+
+With ``--refresh`` the existing output is reused: only members that are new
+to a roster or whose ``last_updated`` is older than ``--max-age`` hours are
+fetched again, everyone else keeps their row with the faction columns
+brought up to date. Members and factions whose re-fetch fails keep their
+existing rows too. Members missing from ``--estimates`` keep the estimate
+they have in the existing output, re-fetched or not.
+
+``--base-url`` points the client at another server, e.g. the stub in
+``tests/stub_api.py`` that replays recorded API responses.
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import deque
+
+import aiohttp
+import pandas as pd
+
+from torn.aggregate import plain_labels
+from torn.snapshot import PERSONALSTATS_COLS, SHEET_NAME, SOURCE_PATH, WORKBOOK_COLS, load_members, read_workbook
+
+log = logging.getLogger(__name__)
+
+BASE_URL = 'https://api.torn.com'
+INGEST_PATH = '.cache/ingest/RW_Factions.xlsx'
+CALLS_PER_MINUTE = 100
+# Torn error codes worth retrying: too many requests, API system disabled, temporary error
+RETRY_CODES = {5, 8, 9}
+# HTTP statuses worth retrying: rate limited, or the server or a proxy failing
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Third-party scouting columns the Torn API does not provide
+ESTIMATE_COLS = ['bs_estimate', 'bs_estimate_human', 'bss_public']
+
+
+class TornAPIError(Exception):
+    def __init__(self, code, message):
+        super().__init__(f'Torn API error {code}: {message}')
+        self.code = code
+
+
+class RateLimiter:
+    """At most ``calls`` acquisitions in any ``period`` seconds."""
+
+    def __init__(self, calls=CALLS_PER_MINUTE, period=60.0):
+        self.calls = calls
+        self.period = period
+        self._stamps = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._stamps and now - self._stamps[0] >= self.period:
+                    self._stamps.popleft()
+                if len(self._stamps) < self.calls:
+                    self._stamps.append(now)
+                    return
+                await asyncio.sleep(self.period - (now - self._stamps[0]))
+
+
+class TornClient:
+    def __init__(self, session, keys, base_url=BASE_URL, calls_per_minute=CALLS_PER_MINUTE, retries=3):
+        self.session = session
+        self.base_url = base_url.rstrip('/')
+        self.retries = retries
+        # Requests rotate over the keys, each throttled by its own limiter
+        self._keys = itertools.cycle([(key, RateLimiter(calls_per_minute)) for key in keys])
+
+    async def get(self, section, resource_id='', selections=''):
+        url = f'{self.base_url}/{section}/{resource_id}'
+        for attempt in range(self.retries + 1):
+            key, limiter = next(self._keys)
+            await limiter.acquire()
+            # Transient HTTP and connection failures back off like Torn's own retry codes
+            try:
+                async with self.session.get(url, params={'selections': selections, 'key': key}) as resp:
+                    resp.raise_for_status()
+                    data = await resp.json(content_type=None)
+            except aiohttp.ClientResponseError as exc:
+                if exc.status not in RETRY_STATUSES or attempt == self.retries:
+                    raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+            else:
+                error = data.get('error')
+                if not error:
+                    return data
+                if error.get('code') not in RETRY_CODES or attempt == self.retries:
+                    raise TornAPIError(error.get('code'), error.get('error'))
+            await asyncio.sleep(2 ** attempt)
+
+
+async def fetch_rankwar_faction_ids(client):
+    data = await client.get('torn', selections='rankedwars')
+    return sorted({
+        int(faction_id)
+        for war in data.get('rankedwars', {}).values()
+        for faction_id in war.get('factions', {})
+    })
+
+
+async def fetch_faction(client, faction_id):
+    data = await client.get('faction', faction_id, 'basic')
+    rank = data.get('rank', {})
+    faction = {
+        'Faction ID': int(data.get('ID', faction_id)),
+        'Faction Name': data.get('name'),
+        'Tag': data.get('tag'),
+        'Number of Members': len(data.get('members', {})),
+        'Rank Level': rank.get('level'),
+        'Rank Name': rank.get('name'),
+        'Division': rank.get('division'),
+        'Rank Position': rank.get('position'),
+        'Rank Wins': rank.get('wins'),
+    }
+    return faction, [int(member_id) for member_id in data.get('members', {})]
+
+
+async def fetch_member(client, member_id):
+    data = await client.get('user', member_id, 'profile,personalstats')
+    stats = data.get('personalstats', {})
+    member = {
+        'Member Name': data.get('name'),
+        'Member ID': int(data.get('player_id', member_id)),
+        'awards': data.get('awards'),
+        'last_updated': pd.Timestamp.now().floor('s'),
+    }
+    member.update({col: stats.get(col, 0) for col in PERSONALSTATS_COLS})
+    return member
+
+
+async def _member_rows(client, faction, member_ids):
+    # Rows of the members that could be fetched, and the IDs of those that could not
+    results = await asyncio.gather(
+        *(fetch_member(client, member_id) for member_id in member_ids),
+        return_exceptions=True
+    )
+    rows, failed = [], []
+    for member_id, result in zip(member_ids, results):
+        if isinstance(result, Exception):
+            log.warning('Skipping member %s: %s', member_id, result)
+            failed.append(member_id)
+            continue
+        rows.append({**faction, **result})
+    return rows, failed
+
+
+def carry_estimates(df, sources):
+    """``df`` with its estimate columns looked up by Member ID in ``sources``.
+
+    Earlier sources win; rows without any estimate never shadow a later source,
+    and members found nowhere are left empty.
+    """
+    known = pd.concat([plain_labels(source)[['Member ID', *ESTIMATE_COLS]] for source in sources])
+    known = known.dropna(subset=ESTIMATE_COLS, how='all').drop_duplicates('Member ID').set_index('Member ID')
+    looked_up = known.reindex(df['Member ID'].to_numpy())
+    return df.assign(**{col: looked_up[col].to_numpy() for col in ESTIMATE_COLS})
+
+
+def _reusable_rows(fresh, faction, member_ids):
+    # Roster members with a fresh enough row, moved onto the latest faction info
+    known_ids = fresh.index.intersection(member_ids)
+    known = fresh.loc[known_ids].reset_index().assign(**faction)
+    stale_ids = sorted(set(member_ids).difference(known_ids))
+    return known, stale_ids
+
+
+async def ingest(keys, faction_ids=None, base_url=BASE_URL, max_connections=20,
+                 calls_per_minute=CALLS_PER_MINUTE, current=None, max_age=None, estimates=None):
+    """Fetch every member of the given (or currently ranked-warring) factions.
+
+    When ``current`` is given only members missing from it, or last updated
+    more than ``max_age`` ago, are fetched; the rest are carried over. A
+    member or faction that cannot be fetched keeps its rows from ``current``.
+    Estimate columns are looked up by Member ID in ``estimates``, then in
+    ``current``.
+    """
+    reused = []
+    previous = fresh = None
+    if current is not None:
+        cutoff = pd.Timestamp.now() - (max_age or pd.Timedelta(0))
+        previous = plain_labels(current).drop_duplicates('Member ID').set_index('Member ID')
+        fresh = previous[previous['last_updated'] >= cutoff]
+    connector = aiohttp.TCPConnector(limit=max_connections)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        client = TornClient(session, keys, base_url, calls_per_minute)
+        if not faction_ids:
+            faction_ids = await fetch_rankwar_faction_ids(client)
+        log.info('Fetching %d factions', len(faction_ids))
+
+        factions = await asyncio.gather(
+            *(fetch_faction(client, faction_id) for faction_id in faction_ids),
+            return_exceptions=True
+        )
+        fetched_factions = []
+        failed_factions = []
+        for faction_id, result in zip(faction_ids, factions):
+            if isinstance(result, Exception):
+                log.warning('Skipping faction %s: %s', faction_id, result)
+                failed_factions.append(faction_id)
+                continue
+            faction, member_ids = result
+            if fresh is not None:
+                known, member_ids = _reusable_rows(fresh, faction, member_ids)
+                reused.append(known[WORKBOOK_COLS])
+            fetched_factions.append((faction, member_ids))
+        batches = await asyncio.gather(
+            *(_member_rows(client, faction, member_ids) for faction, member_ids in fetched_factions)
+        )
+        rows = [row for batch, _ in batches for row in batch]
+        failed_members = [member_id for _, failed in batches for member_id in failed]
+        log.info('Fetched %d members, reused %d', len(rows), sum(len(r) for r in reused))
+
+    # A failed re-fetch must not drop what the existing output already has:
+    # failed members keep their previous row (on the latest faction info),
+    # failed factions keep all of theirs
+    kept = []
+    if previous is not None:
+        for (faction, _), (_, failed) in zip(fetched_factions, batches):
+            kept.append(_reusable_rows(previous, faction, failed)[0][WORKBOOK_COLS])
+        in_failed = previous['Faction ID'].isin(failed_factions)
+        kept.append(previous[in_failed].reset_index()[WORKBOOK_COLS])
+        reused.extend(k for k in kept if len(k))
+    if failed_factions or failed_members:
+        log.warning('Incomplete output: %d factions and %d members could not be fetched '
+                    '(%d members kept their previous row)',
+                    len(failed_factions), len(failed_members), sum(len(k) for k in kept))
+
+    # Battlestat estimates come from third-party scouting, not the Torn API;
+    # members found in neither source are left empty
+    df = pd.DataFrame(rows, columns=WORKBOOK_COLS)
+    if reused:
+        # An empty fetch would turn every column to object
+        df = pd.concat([*reused, df] if rows else reused, ignore_index=True)
+        df = df.sort_values('Faction ID', kind='stable').reset_index(drop=True)
+    sources = [source for source in (estimates, current) if source is not None]
+    if sources:
+        df = carry_estimates(df, sources)
+    return df
+
+
+def read_members(path):
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    # Every workbook column, not just the snapshot's, since rows are reused as-is
+    return read_workbook(path, columns=WORKBOOK_COLS)
+
+
+def read_estimates(path):
+    # Only the IDs and estimates are needed, so the workbook's cached snapshot will do
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=['Member ID', *ESTIMATE_COLS])
+    return load_members(path)[['Member ID', *ESTIMATE_COLS]]
+
+
+def write_members(df, out=INGEST_PATH, sheet_name=SHEET_NAME):
+    if os.path.dirname(out):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+    if out.endswith('.parquet'):
+        df.to_parquet(out, index=False)
+    else:
+        df.to_excel(out, sheet_name=sheet_name, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the RW_Factions member table from the Torn API.')
+    parser.add_argument('--key', action='append', default=[], help='Torn API key (repeat for more keys)')
+    parser.add_argument('--faction', action='append', type=int, default=[],
+                        help='Faction ID to fetch (default: every faction in a ranked war)')
+    parser.add_argument('--out', default=INGEST_PATH, help='.xlsx (RW_Factions sheet) or .parquet output')
+    parser.add_argument('--estimates', default=SOURCE_PATH,
+                        help="Workbook or .parquet with battlestat estimates by Member ID ('' for none)")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--max-connections', type=int, default=20)
+    parser.add_argument('--calls-per-minute', type=int, default=CALLS_PER_MINUTE)
+    parser.add_argument('--refresh', action='store_true',
+                        help='Only re-fetch members that are new or stale in the existing output')
+    parser.add_argument('--max-age', type=float, default=24.0,
+                        help='Hours before a member counts as stale in --refresh mode')
+    args = parser.parse_args(argv)
+
+    keys = args.key or [k for k in os.environ.get('TORN_API_KEYS', '').split(',') if k]
+    if not keys:
+        parser.error('pass --key or set TORN_API_KEYS')
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    started = time.perf_counter()
+    current = read_members(args.out) if args.refresh and os.path.exists(args.out) else None
+    estimates = None
+    if args.estimates and os.path.exists(args.estimates):
+        estimates = read_estimates(args.estimates)
+    elif args.estimates:
+        log.warning('No estimates file at %s; battlestat estimates stay empty', args.estimates)
+    df = asyncio.run(ingest(
+        keys, args.faction, args.base_url, args.max_connections, args.calls_per_minute,
+        current=current, max_age=pd.Timedelta(hours=args.max_age), estimates=estimates
+    ))
+    write_members(df, args.out)
+    log.info('Wrote %d members from %d factions to %s in %.1fs',
+             len(df), df['Faction ID'].nunique(), args.out, time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Server-side sorting and paging for the member table.
+
+Sorting the filtered members on every rerun and shipping all of them to the
+browser is what made large selections slow. Instead each snapshot keeps one
+stable ordering of the whole member table per (column, direction), built on
+first use, and a filtered selection is sorted by walking that ordering and
+keeping the selected rows. Only the visible page is ever materialised, and
+the top-N charts read the first selected rows straight off the ordering.
+"""
+import threading
+
+import numpy as np
+
+
+class MemberOrderings:
+    def __init__(self, members):
+        self._members = members
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    def order(self, col, descending=False):
+        """Row positions of the whole table sorted by ``col``, missing values last."""
+        key = (col, descending)
+        with self._lock:
+            if key not in self._orders:
+                column = self._members[col].reset_index(drop=True)
+                self._orders[key] = column.sort_values(
+                    ascending=not descending, kind='stable', na_position='last'
+                ).index.to_numpy()
+            return self._orders[key]
+
+
+def selection_mask(rows, n_rows):
+    """Boolean mask over the whole table for ``rows``, or None when every row is selected."""
+    if len(rows) == n_rows:
+        return None
+    selected = np.zeros(n_rows, dtype=bool)
+    selected[rows] = True
+    return selected
+
+
+def sorted_rows(order, rows, n_rows):
+    """``rows`` (positions of the filtered members) in the order given by ``order``."""
+    if order is None:
+        return rows
+    selected = selection_mask(rows, n_rows)
+    return order if selected is None else order[selected[order]]
+
+
+def top_rows(order, selected, n):
+    """The first ``n`` positions of ``order`` that fall inside the ``selected`` mask.
+
+    Only a prefix of the ordering is tested, growing until enough selected
+    rows are found, so top-N of a large selection touches a few dozen rows.
+    """
+    if selected is None:
+        return order[:n]
+    k = max(n, 1) * 4
+    while True:
+        head = order[:k]
+        hits = head[selected[head]]
+        if len(hits) >= n or k >= len(order):
+            return hits[:n]
+        k *= 4
+
+
+def page_count(n_items, page_size):
+    return max(1, -(-n_items // page_size))
+
+
+def page_slice(rows, page, page_size):
+    # ``page`` is 1-based, like the page picker
+    start = (page - 1) * page_size
+    return rows[start:start + page_size]
@@ -0,0 +1,184 @@
+"""Battlestats regression for the Machine Learning page.
+
+``bs_estimate`` spans seven orders of magnitude and the personal stats are
+just as skewed, so the model is a ridge regression on log1p of both sides,
+fitted in closed form with numpy. Its few arrays are saved as an ``.npz``
+artifact next to the snapshots, keyed by the workbook content, so a server
+restart loads the model instead of refitting it:
+
+    python -m torn.predict [path/to/RW_Factions.xlsx]
+
+``python -m torn.train`` writes the same artifact after a cross-validated
+search over the ridge penalty. Prediction is one matrix product over every
+member at once.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from torn.snapshot import PERSONALSTATS_COLS, SHEET_NAME, SOURCE_PATH, load_members, source_key
+
+FEATURE_COLS = [*PERSONALSTATS_COLS, 'awards']
+TARGET_COL = 'bs_estimate'
+MODEL_DIR = '.cache/models'
+# Bump when the features or the transform change so old artifacts are ignored
+MODEL_VERSION = 1
+# Fewer members with a known estimate than this cannot be fitted and scored
+MIN_TRAINING_ROWS = 10
+
+
+class TrainingDataError(ValueError):
+    """Too few members with a known estimate to fit the model."""
+
+
+def feature_matrix(members, feature_cols=FEATURE_COLS):
+    # Missing or negative stats count as zero before the log transform
+    values = members[feature_cols].to_numpy(dtype='float64', na_value=np.nan)
+    return np.log1p(np.clip(np.nan_to_num(values, nan=0.0), 0, None))
+
+
+def _fit_ridge(X, y, alpha):
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    Z = (X - mean) / scale
+    intercept = y.mean()
+    coef = np.linalg.solve(Z.T @ Z + alpha * np.eye(Z.shape[1]), Z.T @ (y - intercept))
+    return mean, scale, coef, intercept
+
+
+def _r2(y, fitted):
+    return 1 - np.sum((y - fitted) ** 2) / np.sum((y - y.mean()) ** 2)
+
+
+class BattlestatsModel:
+    def __init__(self, feature_cols, mean, scale, coef, intercept, alpha, bounds, metrics=None):
+        self.feature_cols = list(feature_cols)
+        self.mean = mean
+        self.scale = scale
+        self.coef = coef
+        self.intercept = float(intercept)
+        self.alpha = float(alpha)
+        # log1p range of the training target; predictions never leave it
+        self.bounds = np.asarray(bounds, dtype='float64')
+        self.metrics = metrics or {}
+
+    def predict_log(self, X):
+        return np.clip((X - self.mean) / self.scale @ self.coef + self.intercept, *self.bounds)
+
+    def predict(self, members):
+        """Predicted battlestats for every row of ``members`` in one call."""
+        return np.expm1(self.predict_log(feature_matrix(members, self.feature_cols)))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.tmp.npz'
+        np.savez(
+            tmp_path,
+            feature_cols=np.array(self.feature_cols),
+            mean=self.mean, scale=self.scale, coef=self.coef,
+            intercept=self.intercept, alpha=self.alpha, bounds=self.bounds,
+            metric_names=np.array(list(self.metrics)),
+            metric_values=np.array(list(self.metrics.values()), dtype='float64')
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            return cls(
+                f['feature_cols'].tolist(), f['mean'], f['scale'], f['coef'],
+                f['intercept'], f['alpha'], f['bounds'],
+                dict(zip(f['metric_names'].tolist(), f['metric_values'].tolist()))
+            )
+
+
+def training_data(members):
+    """Features and log1p target for the members with a known estimate."""
+    known = members[members[TARGET_COL].notna() & (members[TARGET_COL] > 0)]
+    if len(known) < MIN_TRAINING_ROWS:
+        raise TrainingDataError(
+            f'{len(known)} members have a {TARGET_COL}; at least {MIN_TRAINING_ROWS} are needed to fit the model'
+        )
+    return feature_matrix(known), np.log1p(known[TARGET_COL].to_numpy(dtype='float64'))
+
+
+def score(y, fitted):
+    return {
+        'r2_log': float(_r2(y, fitted)),
+        # Typical miss as a factor, e.g. 3.0 means "within 3x" for half the members
+        'median_factor': float(np.exp(np.median(np.abs(y - fitted))))
+    }
+
+
+def fit_model(X, y, alpha, metrics=None):
+    mean, scale, coef, intercept = _fit_ridge(X, y, alpha)
+    return BattlestatsModel(FEATURE_COLS, mean, scale, coef, intercept, alpha, (y.min(), y.max()), metrics)
+
+
+def train_model(members, alpha=1.0, holdout=0.2, seed=0):
+    """Fit on members with a known estimate; the metrics come from a held-out split."""
+    X, y = training_data(members)
+
+    test = np.random.default_rng(seed).random(len(y)) < holdout
+    held_out = fit_model(X[~test], y[~test], alpha)
+    metrics = {
+        **score(y[test], held_out.predict_log(X[test])),
+        'n_train': int((~test).sum()),
+        'n_test': int(test.sum())
+    }
+
+    # The served model is refitted on every member with a known estimate
+    return fit_model(X, y, alpha, metrics)
+
+
+def model_path(key, sheet_name=SHEET_NAME, model_dir=MODEL_DIR):
+    # Keyed by sheet too, like snapshot_path: sheets of one workbook share its key
+    return os.path.join(model_dir, f'bs_estimate-{sheet_name}-v{MODEL_VERSION}-{key}.npz')
+
+
+def load_report(key, sheet_name=SHEET_NAME, model_dir=MODEL_DIR):
+    """Metrics report written by ``python -m torn.train``, or None."""
+    report_path = os.path.splitext(model_path(key, sheet_name, model_dir))[0] + '.json'
+    if not os.path.exists(report_path):
+        return None
+    with open(report_path) as f:
+        return json.load(f)
+
+
+def load_or_train(members, key, sheet_name=SHEET_NAME, model_dir=MODEL_DIR):
+    # Normally the artifact comes from ``python -m torn.train``; the quick
+    # single fit is only a fallback for a workbook nobody has trained on yet
+    path = model_path(key, sheet_name, model_dir)
+    if os.path.exists(path):
+        return BattlestatsModel.load(path)
+    model = train_model(members)
+    try:
+        model.save(path)
+    except OSError:
+        # A read-only checkout still gets a model, it just isn't kept
+        pass
+    return model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fit and save the battlestats model for a workbook.')
+    parser.add_argument('path', nargs='?', default=SOURCE_PATH)
+    parser.add_argument('--sheet', default=SHEET_NAME)
+    parser.add_argument('--alpha', type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    model = train_model(load_members(args.path, args.sheet), alpha=args.alpha)
+    path = model_path(source_key(args.path), args.sheet)
+    model.save(path)
+    # A cross-validation report from torn.train no longer describes this model
+    report_path = os.path.splitext(path)[0] + '.json'
+    if os.path.exists(report_path):
+        os.remove(report_path)
+    print(f'{path}: ' + ', '.join(f'{k}={v:.3g}' for k, v in model.metrics.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Per-rerun stage timings for the dashboard pages.
+
+A page creates one ``RerunProfile`` at the top, wraps each stage in
+``profile.stage(name)`` and calls ``profile.finish()`` at the bottom. That
+logs one JSON line per rerun on the ``torn.profile`` logger (stage
+durations in ms plus cache hit rates, tagged with page and session) and,
+when the sidebar toggle is on, shows the breakdown for the current rerun.
+
+Log lines go to stderr, or to the file named by ``TORN_PROFILE_LOG`` so
+they can be collected and aggregated across sessions.
+"""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+log = logging.getLogger('torn.profile')
+if not log.handlers:
+    _handler = logging.FileHandler(os.environ['TORN_PROFILE_LOG']) if os.environ.get('TORN_PROFILE_LOG') else logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+
+class RerunProfile:
+    def __init__(self, page):
+        self.page = page
+        self.stages = []
+        self.caches = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - started))
+
+    def watch_cache(self, name, cache):
+        # Anything with a ResultCache-style stats() method
+        self.caches[name] = cache
+
+    def breakdown(self):
+        total = time.perf_counter() - self._started
+        timings = pd.DataFrame(self.stages, columns=['Stage', 'ms'])
+        # Stages can repeat (e.g. one per chart), so report them summed
+        timings = timings.groupby('Stage', sort=False, as_index=False)['ms'].sum()
+        other = total - timings['ms'].sum()
+        timings.loc[len(timings)] = ['other', max(other, 0.0)]
+        timings['ms'] *= 1e3
+        timings['share'] = timings['ms'] / (total * 1e3) * 100
+        return timings, total * 1e3
+
+    def finish(self):
+        timings, total_ms = self.breakdown()
+        ctx = get_script_run_ctx()
+        log.info(json.dumps({
+            'event': 'rerun',
+            'ts': time.time(),
+            'page': self.page,
+            'session': ctx.session_id if ctx else None,
+            'total_ms': round(total_ms, 3),
+            'stages': {stage: round(ms, 3) for stage, ms in zip(timings['Stage'], timings['ms'])},
+            'caches': {name: cache.stats() for name, cache in self.caches.items()}
+        }))
+
+        if st.sidebar.toggle("Show rerun timings", key="show_rerun_profile"):
+            st.sidebar.caption(f"This rerun: {total_ms:,.0f} ms")
+            st.sidebar.dataframe(
+                timings,
+                column_config={
+                    "ms": st.column_config.NumberColumn("ms", format="%.1f"),
+                    "share": st.column_config.ProgressColumn("Share", min_value=0, max_value=100, format="%.0f%%")
+                },
+                hide_index=True
+            )
+            for name, cache in self.caches.items():
+                stats = cache.stats()
+                st.sidebar.caption(
+                    f"{name} cache: {stats['hit_rate']:.0%} hit rate "
+                    f"({stats['hits']} hits, {stats['misses']} misses, {stats['size']} entries)"
+                )
@@ -0,0 +1,195 @@
+"""Query backends behind the member dashboard's filters and ``faction_stats``.
+
+The default backend is the numpy path (``FilterIndex`` plus ``aggregate``).
+With ``TORN_QUERY_BACKEND=duckdb`` and duckdb installed, each snapshot is
+also loaded into an in-process DuckDB table and the same two calls become
+SQL: filters are pushed down as predicates on integer category codes, each
+query scans only the columns it needs, and the group-by runs on all cores.
+Both backends return the same row positions and the same frame, so the page
+does not care which one it got; ``python -m benchmarks.backends`` checks
+that on random sidebar states.
+
+The player search stays on the trigram ``NameIndex`` in both backends; its
+matches are handed to DuckDB as a row-id table.
+"""
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from torn.aggregate import aggregate
+from torn.filters import filter_rows, search_rows
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+log = logging.getLogger(__name__)
+
+QUERY_BACKEND = os.environ.get('TORN_QUERY_BACKEND', 'pandas')
+
+
+def _quote(col):
+    return '"' + col.replace('"', '""') + '"'
+
+
+def _code_col(col):
+    return _quote(f'{col}#code')
+
+
+class PandasBackend:
+    name = 'pandas'
+
+    def __init__(self, members, filter_index):
+        self._members = members
+        self._filter_index = filter_index
+
+    def filter_rows(self, name_index, rank_divisions, factions, search, member_range):
+        return filter_rows(self._filter_index, name_index, rank_divisions, factions, search, member_range)
+
+    def aggregate(self, by, spec, rows=None):
+        return aggregate(self._members, by, spec, rows=rows)
+
+
+class DuckDBBackend:
+    name = 'duckdb'
+
+    def __init__(self, members, filter_index):
+        self._members = members
+        self._filter_index = filter_index
+        self._categorical = [col for col in members.columns if isinstance(members[col].dtype, pd.CategoricalDtype)]
+
+        # Categoricals become a plain label column plus an integer code
+        # column; filters and ordering use the codes so results line up with
+        # the numpy path exactly
+        columns = {'row_id': np.arange(len(members), dtype='int64')}
+        for col in members.columns:
+            if col in self._categorical:
+                columns[col] = members[col].astype(object)
+                columns[f'{col}#code'] = members[col].cat.codes.astype('int32')
+            else:
+                columns[col] = members[col]
+        table = pa.Table.from_pandas(pd.DataFrame(columns), preserve_index=False)
+
+        self._con = duckdb.connect()
+        self._con.register('snapshot_arrow', table)
+        self._con.execute('CREATE TABLE members AS SELECT * FROM snapshot_arrow')
+        self._con.unregister('snapshot_arrow')
+        self._lock = threading.Lock()
+
+    def _cursor(self):
+        # One cursor per query so concurrent sessions don't share a connection
+        with self._lock:
+            return self._con.cursor()
+
+    def filter_rows(self, name_index, rank_divisions, factions, search, member_range):
+        conditions, params = [], []
+        for col, labels, index in [
+            ('Rank & Division', rank_divisions, self._filter_index.rank_divisions),
+            ('Faction Name', factions, self._filter_index.factions),
+        ]:
+            if labels:
+                conditions.append(f'{_code_col(col)} IN (SELECT unnest(?::INTEGER[]))')
+                params.append(index.lookup(labels).tolist())
+
+        cursor = self._cursor()
+        matches, fuzzy = search_rows(name_index, search)
+        if matches is not None:
+            cursor.register('matches', pa.table({'row_id': np.asarray(matches, dtype='int64')}))
+            conditions.append('row_id IN (SELECT row_id FROM matches)')
+
+        where = ' AND '.join(conditions) or 'TRUE'
+        faction_code = _code_col('Faction Name')
+        # Faction sizes are named members inside the current selection, and
+        # members without a faction are always dropped, like FilterIndex
+        rows = cursor.execute(f'''
+            WITH selected AS (
+                SELECT row_id, {faction_code} AS faction, {_quote('Member Name')} AS name FROM members WHERE {where}
+            ), in_range AS (
+                SELECT faction FROM selected WHERE faction >= 0
+                GROUP BY faction HAVING count(name) BETWEEN ? AND ?
+            )
+            SELECT row_id FROM selected
+            WHERE faction IN (SELECT faction FROM in_range)
+            ORDER BY row_id
+        ''', [*params, int(member_range[0]), int(member_range[1])]).fetchnumpy()['row_id']
+        cursor.close()
+        return rows.astype('int64'), fuzzy
+
+    def _select(self, col, how):
+        quoted = _quote(col)
+        if how == 'size':
+            return 'count(*)'
+        if how == 'count':
+            return f'count({quoted})'
+        if how == 'sum':
+            # Empty groups sum to 0 and integer sums stay integers, as in aggregate()
+            if pd.api.types.is_integer_dtype(self._members[col].dtype):
+                return f'CAST(coalesce(sum({quoted}), 0) AS BIGINT)'
+            return f'coalesce(sum(CAST({quoted} AS DOUBLE)), 0)'
+        if how == 'mean':
+            return f'avg(CAST({quoted} AS DOUBLE))'
+        raise ValueError(f"Unsupported aggregation '{how}' for column '{col}'")
+
+    def aggregate(self, by, spec, rows=None):
+        if not (isinstance(by, str) and by in self._categorical):
+            # Multi-column keys only come up off the hot path
+            return aggregate(self._members, by, spec, rows=rows)
+
+        cursor = self._cursor()
+        where = 'TRUE'
+        if rows is not None and len(rows) < len(self._members):
+            cursor.register('selection', pa.table({'row_id': np.asarray(rows, dtype='int64')}))
+            where = 'row_id IN (SELECT row_id FROM selection)'
+
+        key, key_code = _quote(by), _code_col(by)
+        plain = {col: how for col, how in spec.items() if how != 'mode'}
+        modal = [col for col, how in spec.items() if how == 'mode']
+        selects = [f'{self._select(col, how)} AS {_quote(col)}' for col, how in plain.items()]
+
+        # Only the key and the aggregated columns are read
+        needed = [key, key_code, *(_quote(col) for col in spec if col != by)]
+        needed += [_code_col(col) for col in modal if col in self._categorical]
+
+        # Modal label per group: most rows first, lowest category code on ties
+        mode_ctes, mode_joins = [], []
+        for i, col in enumerate(modal):
+            label = _quote(col)
+            code = _code_col(col) if col in self._categorical else label
+            mode_ctes.append(f''',
+            mode_{i} AS (
+                SELECT grp, first(label ORDER BY n DESC, code) AS label FROM (
+                    SELECT {key_code} AS grp, CAST({label} AS VARCHAR) AS label, {code} AS code, count(*) AS n
+                    FROM selected WHERE {label} IS NOT NULL GROUP BY ALL
+                ) GROUP BY grp
+            )''')
+            mode_joins.append(f'LEFT JOIN mode_{i} ON mode_{i}.grp = stats.grp')
+
+        columns = [key, *(_quote(col) for col in plain)]
+        columns += [f"coalesce(mode_{i}.label, '') AS {_quote(col)}" for i, col in enumerate(modal)]
+        result = cursor.execute(f'''
+            WITH selected AS (
+                SELECT {', '.join(dict.fromkeys(needed))} FROM members WHERE {where} AND {key_code} >= 0
+            ),
+            stats AS (
+                SELECT {key_code} AS grp, any_value({key}) AS {key}{''.join(', ' + s for s in selects)}
+                FROM selected GROUP BY grp
+            ){''.join(mode_ctes)}
+            SELECT {', '.join(columns)} FROM stats {' '.join(mode_joins)}
+            ORDER BY stats.grp
+        ''').df()
+        cursor.close()
+        # Same column order as the spec, like aggregate()
+        return result[[by, *spec]]
+
+
+def make_backend(members, filter_index, backend=QUERY_BACKEND):
+    if backend == 'duckdb':
+        if duckdb is not None:
+            return DuckDBBackend(members, filter_index)
+        log.warning('TORN_QUERY_BACKEND=duckdb but duckdb is not installed; using pandas')
+    return PandasBackend(members, filter_index)
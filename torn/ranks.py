@@ -0,0 +1,109 @@
+"""Per-KPI ranks and percentiles of every member, globally and within groups.
+
+"Where does this player stand" used to mean sorting the table or reading the
+top-10 charts. Each snapshot instead ranks every member on each KPI once, in
+three scopes: all members, their faction, and their Rank & Division bracket.
+A scope is ranked with one ``lexsort`` on (group code, value) and a few
+run-length passes, so every group is done at once. Ranks count from the
+highest value (1 = best, ties share the best rank), and the percentile is
+the share of the scope at or below the member's value, so the best member
+of a scope sits at 100. Members without a value are left unranked and do
+not count towards the scope size.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from torn.aggregate import group_codes
+
+# KPIs ranked per snapshot (the numeric member columns the pages show)
+RANK_KPIS = [
+    'bs_estimate', 'bss_public', 'elo', 'networth', 'rankedwarhits', 'rankedwarringwins',
+    'respectforfaction', 'attackswon', 'retals', 'useractivity', 'refills', 'boostersused',
+    'energydrinkused', 'drugsused', 'xantaken', 'alcoholused', 'candyused', 'booksread'
+]
+
+# Scope label -> grouping column (None ranks against every member)
+RANK_SCOPES = {
+    'All members': None,
+    'Faction': 'Faction Name',
+    'Rank & Division': 'Rank & Division'
+}
+
+
+def scope_ranks(values, codes):
+    """Rank, percentile and group size per row of ``values`` within ``codes`` groups.
+
+    Rows with a missing value or group code -1 get NaN rank and percentile.
+    Returns float32 ``rank`` and ``pct`` arrays and the count of ranked rows
+    per group code.
+    """
+    n_rows = len(values)
+    rank = np.full(n_rows, np.nan, dtype='float32')
+    pct = np.full(n_rows, np.nan, dtype='float32')
+    n_groups = int(codes.max()) + 1 if n_rows else 0
+    valid = np.flatnonzero(~np.isnan(values) & (codes >= 0))
+    if not len(valid):
+        return rank, pct, np.zeros(n_groups, dtype='int64')
+
+    # Ascending by value inside each group
+    order = np.lexsort((values[valid], codes[valid]))
+    rows = valid[order]
+    v, g = values[rows], codes[rows]
+    m = len(rows)
+
+    new_group = np.r_[True, g[1:] != g[:-1]]
+    # A run is a stretch of equal values inside one group (a tie)
+    new_run = new_group | np.r_[True, v[1:] != v[:-1]]
+    group_start = np.flatnonzero(new_group)
+    group_of = np.cumsum(new_group) - 1
+    run_end = np.r_[np.flatnonzero(new_run)[1:], m]
+    run_of = np.cumsum(new_run) - 1
+
+    sizes = np.diff(np.r_[group_start, m])[group_of]
+    at_or_below = run_end[run_of] - group_start[group_of]
+    rank[rows] = sizes - at_or_below + 1
+    pct[rows] = 100 * at_or_below / sizes
+    return rank, pct, np.bincount(g, minlength=n_groups)
+
+
+class MemberRanks:
+    """Ranks of every member per KPI and scope, built per KPI on first use."""
+
+    def __init__(self, members, kpis=RANK_KPIS, scopes=RANK_SCOPES):
+        self._members = members
+        self.kpis = [kpi for kpi in kpis if kpi in members.columns]
+        self.scopes = scopes
+        # Group code per row for each scope, shared by every KPI
+        self._codes = {
+            scope: np.zeros(len(members), dtype='int64') if by is None else group_codes(members, by)[0]
+            for scope, by in scopes.items()
+        }
+        self._ranks = {}
+        self._lock = threading.Lock()
+
+    def column(self, kpi):
+        """``{scope: (rank, pct, group_sizes)}`` for one KPI."""
+        with self._lock:
+            if kpi not in self._ranks:
+                values = pd.to_numeric(self._members[kpi]).to_numpy(dtype='float64', na_value=np.nan)
+                self._ranks[kpi] = {scope: scope_ranks(values, codes) for scope, codes in self._codes.items()}
+            return self._ranks[kpi]
+
+    def percentiles(self, kpi, scope, rows):
+        """Percentile of the members at ``rows`` within ``scope``."""
+        return self.column(kpi)[scope][1][rows]
+
+    def player(self, row, kpis=None):
+        """One line per KPI with the member's value, rank and percentile in every scope."""
+        lines = []
+        for kpi in kpis or self.kpis:
+            line = {'KPI': kpi, 'Value': self._members[kpi].iloc[row]}
+            for scope, (rank, pct, group_sizes) in self.column(kpi).items():
+                ranked = not np.isnan(rank[row])
+                size = group_sizes[self._codes[scope][row]] if ranked else 0
+                line[f'{scope} Rank'] = f'{int(rank[row]):,} of {size:,}' if ranked else ''
+                line[f'{scope} Percentile'] = pct[row]
+            lines.append(line)
+        return pd.DataFrame(lines)
@@ -0,0 +1,75 @@
+"""Trigram index over lowercased member names for the player search box.
+
+Each name is split into its overlapping three-letter grams and every gram
+keeps a sorted array of the rows containing it. A substring query intersects
+the posting lists of its own grams and only verifies the few surviving
+candidates. Typo-tolerant lookups count shared grams instead, since one edit
+can change at most three grams of the query.
+"""
+from collections import defaultdict
+
+import numpy as np
+
+GRAM = 3
+
+
+def _grams(text):
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def _substring_distance(pattern, text):
+    # Fewest edits turning pattern into any substring of text (Sellers' DP)
+    prev = [0] * (len(text) + 1)
+    for i, pc in enumerate(pattern, 1):
+        cur = [i] + [0] * len(text)
+        for j, tc in enumerate(text, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (pc != tc))
+        prev = cur
+    return min(prev)
+
+
+class NameIndex:
+    def __init__(self, names):
+        self.names = names.fillna('').astype(str).str.lower().reset_index(drop=True)
+        postings = defaultdict(list)
+        for row, name in enumerate(self.names):
+            for gram in _grams(name):
+                postings[gram].append(row)
+        self.postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    def _scan(self, query):
+        # Queries shorter than a gram have nothing to look up
+        return np.flatnonzero(self.names.str.contains(query, regex=False).to_numpy())
+
+    def search(self, query, fuzzy=False, max_edits=1):
+        """Sorted row positions whose name contains ``query`` (case-insensitive).
+
+        With ``fuzzy`` the name only has to contain ``query`` within
+        ``max_edits`` insertions, deletions or substitutions.
+        """
+        query = query.strip().lower()
+        if not query:
+            return np.arange(len(self.names))
+        grams = _grams(query)
+        if not fuzzy:
+            if not grams:
+                return self._scan(query)
+            lists = sorted((self.postings.get(g, np.empty(0, np.int32)) for g in grams), key=len)
+            candidates = lists[0]
+            for rows in lists[1:]:
+                if not len(candidates):
+                    break
+                candidates = np.intersect1d(candidates, rows, assume_unique=True)
+            return np.array([r for r in candidates if query in self.names[r]], dtype=np.int32)
+
+        if not grams:
+            return self._scan(query)
+        hits = [self.postings[g] for g in grams if g in self.postings]
+        if not hits:
+            return np.empty(0, dtype=np.int32)
+        rows, shared = np.unique(np.concatenate(hits), return_counts=True)
+        candidates = rows[shared >= max(1, len(grams) - GRAM * max_edits)]
+        return np.array(
+            [r for r in candidates if _substring_distance(query, self.names[r]) <= max_edits],
+            dtype=np.int32
+        )
@@ -0,0 +1,282 @@
+"""Columnar snapshot cache in front of the RW_Factions workbook.
+
+Parsing the xlsx through openpyxl is slow, so the first load converts the
+sheet into a Parquet snapshot keyed by the workbook's content hash. Later
+loads read the snapshot and only re-parse when the workbook bytes change.
+
+The parse itself streams: openpyxl's read-only row iterator is read in
+fixed-size chunks, only the columns the pages use are kept, and each chunk
+goes straight into typed Arrow arrays. Memory therefore grows with the typed
+output, never with openpyxl cell objects for the whole sheet. Multi-war
+exports with one sheet per war can be read together.
+
+The snapshot is stored in a compact schema: repeated labels are categoricals
+and every numeric column is downcast to the narrowest dtype that holds its
+values exactly.
+
+Run ``python -m torn.snapshot`` after replacing the workbook to build the
+snapshot ahead of time.
+"""
+import argparse
+import glob
+import hashlib
+import itertools
+import os
+import re
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+from pandas.api.types import union_categoricals
+from openpyxl.cell.cell import ERROR_CODES
+
+SOURCE_PATH = 'assets/RW_Factions.xlsx'
+SHEET_NAME = 'RW_Factions'
+SNAPSHOT_DIR = '.cache/snapshots'
+# Bump whenever read_workbook/compact_members change what a snapshot holds
+SNAPSHOT_VERSION = 3
+# Workbook rows converted to typed arrays at a time by the streaming reader
+CHUNK_ROWS = 10_000
+
+# Torn API personalstats fields exported per member
+PERSONALSTATS_COLS = [
+    'attackswon', 'attackslost', 'attacksdraw', 'attacksassisted', 'elo', 'retals',
+    'respectforfaction', 'rankedwarhits', 'revives', 'booksread', 'boostersused',
+    'consumablesused', 'candyused', 'alcoholused', 'energydrinkused', 'statenhancersused',
+    'lsdtaken', 'xantaken', 'useractivity', 'rankedwarringwins', 'daysbeendonator',
+    'nerverefills', 'tokenrefills', 'refills', 'drugsused', 'overdosed', 'rehabcost',
+    'networth'
+]
+
+# Column order of the RW_Factions sheet
+WORKBOOK_COLS = [
+    'Faction ID', 'Faction Name', 'Tag', 'Number of Members', 'Rank Level', 'Rank Name',
+    'Division', 'Rank Position', 'Rank Wins', 'Member Name', 'Member ID',
+    *PERSONALSTATS_COLS,
+    'awards', 'bs_estimate', 'bs_estimate_human', 'bss_public', 'last_updated'
+]
+
+# Faction-level columns the pages recompute or never show; not parsed
+SKIPPED_COLS = ['Number of Members', 'Rank Position', 'Rank Wins']
+# Columns kept in the snapshot
+SNAPSHOT_COLS = [col for col in WORKBOOK_COLS if col not in SKIPPED_COLS]
+
+# Columns that occasionally hold non-numeric junk in the export
+NUMERIC_COLS = ['networth', 'bss_public', 'elo']
+# Free-text columns where the export mixes str with int/float cells
+TEXT_COLS = ['Member Name', 'bs_estimate_human']
+# Low-cardinality labels repeated on every member row
+CATEGORY_COLS = ['Faction Name', 'Tag', 'Rank Name']
+DATE_COLS = ['last_updated']
+# Set on every row when several sheets are read together
+SHEET_COL = 'Sheet'
+
+# (path, mtime_ns, size) -> content hash, so reruns don't re-hash an unchanged file
+_key_memo = {}
+
+
+def source_key(path=SOURCE_PATH):
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if memo_key not in _key_memo:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        _key_memo[memo_key] = digest.hexdigest()[:16]
+    return _key_memo[memo_key]
+
+
+def _snapshot_prefix(path, sheet_name):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if sheet_name is None:
+        sheet_name = 'all'
+    elif not isinstance(sheet_name, str):
+        sheet_name = '+'.join(sheet_name)
+    return os.path.join(SNAPSHOT_DIR, f'{stem}-{sheet_name}')
+
+
+def snapshot_path(path=SOURCE_PATH, sheet_name=SHEET_NAME, key=None):
+    key = key or source_key(path)
+    return f'{_snapshot_prefix(path, sheet_name)}-v{SNAPSHOT_VERSION}-{key}.parquet'
+
+
+def compact_column(column, category=False):
+    """``column`` in its narrowest lossless type (a categorical when ``category``)."""
+    if category:
+        return column.astype('category')
+    if pd.api.types.is_integer_dtype(column.dtype):
+        return pd.to_numeric(column, downcast='integer')
+    # float32 only where it round-trips exactly; bs_estimate needs the full width
+    if column.dtype == 'float64':
+        narrow = column.astype('float32')
+        if narrow.astype('float64').equals(column):
+            return narrow
+    return column
+
+
+def compact_members(df):
+    for col in df.columns:
+        if col in CATEGORY_COLS or pd.api.types.is_numeric_dtype(df[col].dtype):
+            df[col] = compact_column(df[col], col in CATEGORY_COLS)
+    return df
+
+
+def _column_type(col):
+    if col in TEXT_COLS or col in CATEGORY_COLS:
+        return pa.string()
+    if col in DATE_COLS:
+        return pa.timestamp('ns')
+    # Integers are widened to float64 so every chunk shares one schema; the
+    # whole columns are narrowed again once all chunks are in
+    return pa.float64()
+
+
+def _column_array(values, col):
+    if col in TEXT_COLS or col in CATEGORY_COLS:
+        # Mixed-type text cells (e.g. numeric player names) become strings;
+        # formula errors such as #NAME? are blanks, as read_excel has them
+        return pa.array([None if v is None or v in ERROR_CODES else str(v) for v in values], pa.string())
+    if col in DATE_COLS:
+        return pa.array(pd.to_datetime(pd.Series(values, dtype=object), errors='coerce'), pa.timestamp('ns'))
+    return pa.array(pd.to_numeric(pd.Series(values, dtype=object), errors='coerce'), pa.float64())
+
+
+def sheet_names(path=SOURCE_PATH):
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def iter_sheet_chunks(path=SOURCE_PATH, sheet_name=SHEET_NAME, columns=SNAPSHOT_COLS, chunk_rows=CHUNK_ROWS):
+    """Yield the sheet as Arrow tables of at most ``chunk_rows`` rows.
+
+    Only ``columns`` that appear in the header are read; blank rows are
+    skipped.
+    """
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = next(rows, ())
+        positions = {}
+        for i, name in enumerate(header):
+            positions.setdefault(name, i)
+        keep = [col for col in columns if col in positions]
+        picks = [positions[col] for col in keep]
+        schema = pa.schema([(col, _column_type(col)) for col in keep])
+
+        while True:
+            block = list(itertools.islice(rows, chunk_rows))
+            if not block:
+                break
+            # Read-only rows stop at their last non-empty cell, so pad short ones
+            picked = [tuple(row[i] if i < len(row) else None for i in picks) for row in block]
+            picked = [row for row in picked if any(v is not None for v in row)]
+            if picked:
+                values = list(zip(*picked))
+                yield pa.table([_column_array(v, col) for v, col in zip(values, keep)], schema=schema)
+    finally:
+        workbook.close()
+
+
+def _chunk_column(array, col):
+    # One column of a chunk in its narrowest type for that chunk. Whole-number
+    # columns without gaps go back to integers, like read_excel
+    column = array.to_pandas()
+    if column.dtype == 'float64':
+        values = column.to_numpy()
+        if not np.isnan(values).any() and np.array_equal(values, np.round(values)):
+            column = pd.Series(values.astype('int64'))
+    return compact_column(column, col in CATEGORY_COLS or col == SHEET_COL)
+
+
+def _join_column(pieces, col):
+    # Widths only grow when pieces are joined (int8 + int16 -> int16, int +
+    # float -> a float that holds both), so one more compaction pass gives
+    # the type the whole column would have had
+    if col in CATEGORY_COLS or col == SHEET_COL:
+        # Sorted like astype('category') on the whole column
+        return pd.Series(union_categoricals(pieces, sort_categories=True))
+    return compact_column(pd.concat(pieces, ignore_index=True))
+
+
+def read_workbook(path=SOURCE_PATH, sheet_name=SHEET_NAME, columns=SNAPSHOT_COLS, chunk_rows=CHUNK_ROWS):
+    """Stream one sheet, a list of sheets, or every sheet (``None``) into a compact frame.
+
+    Every chunk is narrowed column by column as soon as it is read, and each
+    output column is joined from its narrow pieces, which are dropped as it
+    goes; the wide chunk tables never pile up.
+    """
+    if sheet_name is None:
+        sheets = sheet_names(path)
+    elif isinstance(sheet_name, str):
+        sheets = [sheet_name]
+    else:
+        sheets = list(sheet_name)
+
+    # Narrow pieces per column, and every chunk's length for null-filling
+    # columns that only some sheets have
+    pieces = {}
+    lengths = []
+    for sheet in sheets:
+        for chunk in iter_sheet_chunks(path, sheet, columns, chunk_rows):
+            if len(sheets) > 1:
+                chunk = chunk.append_column(SHEET_COL, pa.array([sheet] * len(chunk), pa.string()))
+            for name, array in zip(chunk.column_names, chunk.columns):
+                if name not in pieces:
+                    pieces[name] = [
+                        _chunk_column(pa.nulls(n, _column_type(name)), name) for n in lengths
+                    ]
+                pieces[name].append(_chunk_column(array, name))
+            lengths.append(len(chunk))
+            for name in pieces.keys() - set(chunk.column_names):
+                pieces[name].append(_chunk_column(pa.nulls(len(chunk), _column_type(name)), name))
+    if not lengths:
+        return pd.DataFrame(columns=columns)
+
+    df = pd.DataFrame(index=pd.RangeIndex(sum(lengths)))
+    for name in list(pieces):
+        df[name] = _join_column(pieces.pop(name), name)
+    return df
+
+
+def write_snapshot(df, snap_path, stale_prefix):
+    os.makedirs(os.path.dirname(snap_path), exist_ok=True)
+    # Write to a temp file and rename so readers never see a half-written snapshot
+    tmp_path = f'{snap_path}.{os.getpid()}.tmp'
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, snap_path)
+    # Drop snapshots of older versions of the same workbook/sheet. The glob
+    # alone also matches sheets whose name extends this one (War vs War-2),
+    # so the rest of the name must be just the version and key
+    for stale in glob.glob(f'{glob.escape(stale_prefix)}-v*-*.parquet'):
+        if stale != snap_path and re.fullmatch(r'v\d+-[0-9a-f]+\.parquet', stale[len(stale_prefix) + 1:]):
+            os.remove(stale)
+
+
+def load_members(path=SOURCE_PATH, sheet_name=SHEET_NAME):
+    snap_path = snapshot_path(path, sheet_name)
+    if os.path.exists(snap_path):
+        return pd.read_parquet(snap_path)
+
+    df = read_workbook(path, sheet_name)
+    try:
+        write_snapshot(df, snap_path, _snapshot_prefix(path, sheet_name))
+    except OSError:
+        # Read-only deploys still work, they just re-parse on every cold cache
+        pass
+    return df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the Parquet snapshot for a workbook sheet.')
+    parser.add_argument('--path', default=SOURCE_PATH)
+    parser.add_argument('--sheet', nargs='+', default=[SHEET_NAME], help="Sheet name(s), or 'all'")
+    args = parser.parse_args()
+
+    sheet = None if args.sheet == ['all'] else args.sheet[0] if len(args.sheet) == 1 else args.sheet
+    df = load_members(args.path, sheet)
+    print(f'{snapshot_path(args.path, sheet)}: {len(df):,} rows')
@@ -0,0 +1,30 @@
+"""Bulk cell styling for the comparison tables."""
+import numpy as np
+import pandas as pd
+
+HIGHER_STYLE = 'background-color: #ff7d7d'  # Red for higher
+LOWER_STYLE = 'background-color: #90ee90'  # Green for lower
+
+
+def highlight_cells(comparison_df, ref_values, skip_cols=()):
+    """Style matrix colouring every cell higher/lower than the reference row.
+
+    The faction x metric block is compared against the reference values in
+    one numpy operation; text columns and ``skip_cols`` stay unstyled.
+    """
+    styles = pd.DataFrame('', index=comparison_df.index, columns=comparison_df.columns)
+    numeric_cols = [
+        col for col in comparison_df.select_dtypes('number').columns
+        if col not in skip_cols
+    ]
+    if not numeric_cols:
+        return styles
+
+    values = comparison_df[numeric_cols].to_numpy(dtype='float64')
+    reference = pd.to_numeric(ref_values[numeric_cols], errors='coerce').to_numpy(dtype='float64')
+    # NaN compares False both ways, so missing values stay unstyled
+    styles[numeric_cols] = np.where(
+        values > reference, HIGHER_STYLE,
+        np.where(values < reference, LOWER_STYLE, '')
+    )
+    return styles
@@ -0,0 +1,186 @@
+"""Faction comparison figures for Torn Dashboard 2: head-to-head tornado and bracket heatmap."""
+import numpy as np
+import plotly.graph_objects as go
+
+from torn.cache import ResultCache
+
+# Metrics to compare (matching the reference image)
+TORNADO_METRICS = [
+    'Number of Members', 'attackswon', 'respectforfaction',
+    'networth', 'rankedwarhits','elo','retals', 'energydrinkused',
+    'boostersused', 'lsdtaken', 'xantaken', 'booksread',
+    'statenhancersused','refills', 'alcoholused', 'candyused',
+    'bs_estimate', 'bss_public'
+]
+
+
+# Format values with appropriate units
+def format_values(values, metrics):
+    """Labels for a (rows x metrics) array: $B/$M for networth, M/K otherwise.
+
+    Units are picked for the whole array in one pass.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype='float64'))
+    networth = np.array([m == 'networth' for m in metrics])[None, :]
+    billions = networth & (values >= 1e9)
+    conditions = [billions, networth, values >= 1e6, values >= 1e3]
+    scale = np.select(conditions, [1e9, 1e6, 1e6, 1e3], 1.0)
+    prefix = np.where(networth, '$', '')
+    suffix = np.select(conditions, ['B', 'M', 'M', 'K'], '')
+    decimals = np.select(conditions, [1, 1, 1, 0], 0)
+    scaled = values / scale
+    return np.array([
+        [f"{p}{v:,.{d}f}{s}" for p, v, d, s in zip(*row)]
+        for row in zip(np.broadcast_to(prefix, values.shape), scaled, decimals, suffix)
+    ], dtype=object)
+
+
+def normalize_columns(values):
+    """Min-max scale every metric column to 0..1 across the given factions.
+
+    Constant columns map to 0 and missing values stay missing.
+    """
+    low = np.fmin.reduce(values, axis=0)
+    span = np.fmax.reduce(values, axis=0) - low
+    return (values - low) / np.where(span > 0, span, 1)
+
+
+def tornado_percentages(left, right):
+    # Each metric's pair is normalised to its combined absolute size
+    total = np.abs(left) + np.abs(right)
+    total = np.where(total != 0, total, 1)
+    return -100 * left / total, 100 * right / total
+
+
+class FactionMatrix:
+    """The faction table as a dense faction x metric array.
+
+    Rows are looked up by faction name (first row wins, like the old
+    ``.iloc[0]``), and finished tornado figures are kept per (left, right)
+    pair in a bounded LRU. One matrix belongs to one snapshot, so cached
+    figures never outlive the data they were drawn from.
+    """
+
+    def __init__(self, factions, metrics=TORNADO_METRICS, maxsize=64):
+        self.metrics = list(metrics)
+        self.values = factions[self.metrics].to_numpy(dtype='float64')
+        self.row_of = {}
+        for row, name in enumerate(factions['Faction Name']):
+            self.row_of.setdefault(name, row)
+        self.figure_cache = ResultCache(maxsize=maxsize)
+
+    def row(self, faction):
+        return self.values[self.row_of[faction]]
+
+    def labels(self, faction):
+        return format_values(self.row(faction), self.metrics)[0]
+
+    def rows_for(self, factions):
+        return np.array([self.row_of[f] for f in factions], dtype=np.intp)
+
+    def heatmap(self, factions):
+        factions = tuple(factions)
+        return self.figure_cache.get_or_compute(
+            ('heatmap', factions),
+            lambda: build_heatmap(self.values[self.rows_for(factions)], factions, self.metrics)
+        )
+
+    def figure(self, left_faction, right_faction):
+        return self.figure_cache.get_or_compute(
+            (left_faction, right_faction),
+            lambda: build_tornado(self.row(left_faction), self.row(right_faction),
+                                  left_faction, right_faction, self.metrics)
+        )
+
+
+def build_tornado(left_values, right_values, left_faction, right_faction, metrics=TORNADO_METRICS):
+    # Create PERCENTAGE-BASED tornado chart
+    fig = go.Figure()
+
+    left_values = np.asarray(left_values, dtype='float64')
+    right_values = np.asarray(right_values, dtype='float64')
+    percentages_left, percentages_right = tornado_percentages(left_values, right_values)
+    left_labels, right_labels = format_values(np.vstack([left_values, right_values]), metrics)
+
+    # Add left faction bars (negative percentages)
+    fig.add_trace(go.Bar(
+        y=metrics,
+        x=percentages_left,
+        name=left_faction,
+        orientation='h',
+        marker_color='#1f77b4',
+        text=left_labels,
+        textposition='outside',
+        textfont=dict(size=10),
+        width=0.6
+    ))
+
+    # Add right faction bars (positive percentages)
+    fig.add_trace(go.Bar(
+        y=metrics,
+        x=percentages_right,
+        name=right_faction,
+        orientation='h',
+        marker_color='#ff7f0e',
+        text=right_labels,
+        textposition='outside',
+        textfont=dict(size=10),
+        width=0.6
+    ))
+
+    # Update layout for percentage tornado effect
+    fig.update_layout(
+        title=f"<b>{left_faction} vs {right_faction}</b> - Percentage Comparison",
+        barmode='relative',
+        height=max(600, 35 * len(metrics)),
+        margin=dict(l=220, r=50, b=100, t=80, pad=10),
+        xaxis=dict(
+            title='Percentage of Maximum Value',
+            tickvals=[-100, -75, -50, -25, 0, 25, 50, 75, 100],
+            ticktext=['100%', '75%', '50%', '25%', '0', '25%', '50%', '75%', '100%'],
+            range=[-105, 105],
+            showgrid=True,
+            zeroline=True,
+            zerolinewidth=2,
+            zerolinecolor='black'
+        ),
+        yaxis=dict(
+            autorange='reversed',
+            automargin=True,
+            tickfont=dict(size=11),
+            title=None
+        ),
+        uniformtext_minsize=8,
+        uniformtext_mode='hide',
+        bargap=0.4
+    )
+    return fig
+
+
+def build_heatmap(values, factions, metrics=TORNADO_METRICS):
+    # One normalisation for the whole faction x metric block; colour shows
+    # where each faction sits within the selection, the text the raw value
+    scaled = normalize_columns(values)
+    labels = format_values(values, metrics)
+
+    fig = go.Figure(go.Heatmap(
+        z=scaled,
+        x=metrics,
+        y=list(factions),
+        text=labels,
+        texttemplate='%{text}',
+        textfont=dict(size=10),
+        colorscale='RdYlGn',
+        zmin=0,
+        zmax=1,
+        colorbar=dict(title='Within<br>selection', tickvals=[0, 1], ticktext=['Lowest', 'Highest']),
+        hovertemplate='<b>%{y}</b><br>%{x}: %{text}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=f"<b>{len(factions)} Factions</b> - Metrics Scaled Within Selection",
+        height=max(400, 28 * len(factions) + 200),
+        margin=dict(l=220, r=50, b=40, t=160, pad=10),
+        xaxis=dict(side='top', tickangle=-45),
+        yaxis=dict(autorange='reversed', automargin=True, tickfont=dict(size=11))
+    )
+    return fig
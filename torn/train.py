@@ -0,0 +1,135 @@
+"""Offline training for the battlestats model (``python -m torn.train``).
+
+    python -m torn.train [path/to/RW_Factions.xlsx] [--alphas 0.1 1 10] [--folds 5] [--jobs N]
+
+The engineered feature matrix is cached on disk per workbook version and
+sheet, so repeated searches skip the feature work. Every (fold, candidate) pair is an
+independent fit, run in a process pool across all cores; workers memory-map
+the cached arrays instead of receiving a pickled copy each. The candidate
+with the best mean R² is refitted on every member and written as the
+versioned model artifact the Machine Learning page loads, next to a JSON
+metrics report.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from torn.predict import MODEL_DIR, MODEL_VERSION, fit_model, model_path, score, training_data
+from torn.snapshot import SHEET_NAME, SOURCE_PATH, load_members, source_key
+
+FEATURE_DIR = '.cache/features'
+ALPHAS = [0.01, 0.1, 1.0, 10.0, 100.0, 1000.0]
+
+
+def feature_paths(key, sheet_name=SHEET_NAME, feature_dir=FEATURE_DIR):
+    prefix = os.path.join(feature_dir, f'features-{sheet_name}-v{MODEL_VERSION}-{key}')
+    return f'{prefix}-X.npy', f'{prefix}-y.npy'
+
+
+def cached_features(path, sheet_name, feature_dir=FEATURE_DIR):
+    """Paths of the (X, y) arrays for a workbook, building them on a cache miss."""
+    paths = feature_paths(source_key(path), sheet_name, feature_dir)
+    if not all(os.path.exists(p) for p in paths):
+        os.makedirs(feature_dir, exist_ok=True)
+        for p, array in zip(paths, training_data(load_members(path, sheet_name))):
+            tmp_path = f'{p}.tmp.npy'
+            np.save(tmp_path, array)
+            os.replace(tmp_path, p)
+    return paths
+
+
+def fold_ids(n_rows, folds, seed=0):
+    return np.random.default_rng(seed).permutation(n_rows) % folds
+
+
+# Set once per worker process by _init_worker
+_X = _y = _folds = None
+
+
+def _init_worker(x_path, y_path, folds, seed):
+    global _X, _y, _folds
+    _X = np.load(x_path, mmap_mode='r')
+    _y = np.load(y_path, mmap_mode='r')
+    _folds = fold_ids(len(_y), folds, seed)
+
+
+def _evaluate(task):
+    alpha, fold = task
+    test = _folds == fold
+    model = fit_model(np.asarray(_X[~test]), np.asarray(_y[~test]), alpha)
+    return alpha, fold, score(_y[test], model.predict_log(np.asarray(_X[test])))
+
+
+def cross_validate(x_path, y_path, alphas=ALPHAS, folds=5, jobs=None, seed=0):
+    """Mean and per-fold scores for every candidate alpha."""
+    tasks = [(alpha, fold) for alpha in alphas for fold in range(folds)]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(x_path, y_path, folds, seed)) as pool:
+        results = list(pool.map(_evaluate, tasks))
+
+    report = []
+    for alpha in alphas:
+        scores = [s for a, _, s in results if a == alpha]
+        report.append({
+            'alpha': alpha,
+            'r2_log': float(np.mean([s['r2_log'] for s in scores])),
+            'r2_log_std': float(np.std([s['r2_log'] for s in scores])),
+            'median_factor': float(np.mean([s['median_factor'] for s in scores])),
+            'folds': scores
+        })
+    return report
+
+
+def train(path=SOURCE_PATH, sheet_name=SHEET_NAME, alphas=ALPHAS, folds=5, jobs=None, model_dir=MODEL_DIR):
+    started = time.perf_counter()
+    key = source_key(path)
+    x_path, y_path = cached_features(path, sheet_name)
+    report = cross_validate(x_path, y_path, alphas, folds, jobs)
+    best = max(report, key=lambda r: r['r2_log'])
+
+    X, y = np.load(x_path), np.load(y_path)
+    model = fit_model(X, y, best['alpha'], {
+        'r2_log': best['r2_log'],
+        'median_factor': best['median_factor'],
+        'n_train': int(len(y)),
+        'folds': folds
+    })
+    out_path = model_path(key, sheet_name, model_dir)
+    model.save(out_path)
+
+    report_path = os.path.splitext(out_path)[0] + '.json'
+    with open(report_path, 'w') as f:
+        json.dump({
+            'source': path,
+            'source_key': key,
+            'sheet': sheet_name,
+            'model_version': MODEL_VERSION,
+            'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seconds': round(time.perf_counter() - started, 3),
+            'alpha': best['alpha'],
+            'candidates': report
+        }, f, indent=2)
+    return out_path, report_path, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cross-validate and save the battlestats model.')
+    parser.add_argument('path', nargs='?', default=SOURCE_PATH)
+    parser.add_argument('--sheet', default=SHEET_NAME)
+    parser.add_argument('--alphas', type=float, nargs='+', default=ALPHAS)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--jobs', type=int, help='Worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    out_path, report_path, report = train(args.path, args.sheet, args.alphas, args.folds, args.jobs)
+    for r in report:
+        print(f"alpha={r['alpha']:<8g} r2_log={r['r2_log']:.4f} (±{r['r2_log_std']:.4f})  median_factor={r['median_factor']:.2f}")
+    print(f'model: {out_path}\nreport: {report_path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -37,6 +37,6 @@ st.subheader("Machine Learning", anchor=False)
 st.write(
     """
     - This is just a demonstration of how using the different KPIs in the personal stats to derive out the Predicted Battlestats of the players
-    - Still working in progress so its empty for now
+    - Shows the predicted battlestats totals per faction, and a lookup for the predicted battlestats of a player
     """
 )
\ No newline at end of file
@@ -175,57 +175,26 @@ st.sidebar.caption("Faction data aggregated from member statistics")
 '''
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
+from torn.data import get_snapshot
+from torn.history import faction_history
+from torn.profiling import RerunProfile
+
 st.title("⚔️ Tornado Faction Comparison")
 
-# --- LOAD AND PREPARE DATA ---
-@st.cache_data
-def load_data():
-    df = pd.read_excel('assets/RW_Factions.xlsx', sheet_name='RW_Factions')
-    
-    # Drop unnecessary columns
-    drop_cols = ['Rank Position', 'Member Name', 'Member ID', 'bs_estimate_human', 
-                'last_updated','attackslost', 'attacksdraw','revives',
-                'nerverefills', 'tokenrefills', 'overdosed']
-    df = df.drop(columns=drop_cols, errors='ignore')
-    
-    # Grouping and aggregation
-    group_cols = ['Faction ID', 'Faction Name', 'Tag', 'Rank Level', 'Rank Name', 'Division']
-    df['Number of Members'] = 1
-    
-    grouped = df.groupby(group_cols, as_index=False).agg({
-        'Number of Members': 'sum',
-        'attackswon': 'sum',
-        'attacksassisted': 'sum',
-        'elo': 'mean',
-        'retals': 'sum',
-        'respectforfaction': 'sum',
-        'rankedwarhits': 'sum',
-        'booksread': 'sum',
-        'boostersused': 'sum',
-        'consumablesused': 'sum',
-        'candyused': 'sum',
-        'alcoholused': 'sum',
-        'energydrinkused': 'sum',
-        'statenhancersused': 'sum',
-        'lsdtaken': 'sum',
-        'xantaken': 'sum',
-        'useractivity': 'sum',
-        'rankedwarringwins': 'sum',
-        'daysbeendonator': 'sum',
-        'refills': 'sum',
-        'rehabcost': 'sum',
-        'networth': 'sum',
-        'awards': 'sum',
-        'bs_estimate': 'sum',
-        'bss_public': 'mean'
-    })
-    
-    return grouped
+# Named stage timings for this rerun (logged, and shown in the sidebar on request)
+profile = RerunProfile("comparison_dashboard")
 
-df = load_data()
+# --- LOAD AND PREPARE DATA ---
+# Faction-level aggregate shared with the other pages
+with profile.stage("load snapshot"):
+    snapshot = get_snapshot()
+df = snapshot.factions
+faction_matrix = snapshot.faction_matrix
+profile.watch_cache("tornado", faction_matrix.figure_cache)
 
 # --- SIDEBAR CONTROLS ---
 st.sidebar.header("Comparison Settings")
@@ -233,6 +202,38 @@ st.sidebar.header("Comparison Settings")
 # Get sorted list of factions for dropdowns
 factions = sorted(df['Faction Name'].unique())
 
+comparison_mode = st.sidebar.radio(
+    "Comparison Mode",
+    options=["Head to head", "Whole bracket"],
+    horizontal=True
+)
+
+# --- BRACKET (N-WAY) COMPARISON ---
+if comparison_mode == "Whole bracket":
+    # Brackets in rank order, e.g. "Gold 2"
+    bracket_labels = df.sort_values(['Rank Level', 'Division'])[['Rank Name', 'Division']].astype(str).agg(' '.join, axis=1)
+    bracket = st.sidebar.selectbox("Rank & Division", options=bracket_labels.unique())
+    in_bracket = sorted(df.loc[bracket_labels == bracket, 'Faction Name'].unique())
+    bracket_factions = st.sidebar.multiselect("Factions", options=factions, default=in_bracket)
+    sort_metric = st.sidebar.selectbox("Sort Factions By", options=faction_matrix.metrics, index=faction_matrix.metrics.index('bs_estimate'))
+
+    st.subheader("Bracket Comparison")
+    if not bracket_factions:
+        st.info("Select at least one faction to compare")
+    else:
+        # Strongest first on the chosen metric, missing values last
+        sort_values = faction_matrix.values[faction_matrix.rows_for(bracket_factions), faction_matrix.metrics.index(sort_metric)]
+        ordered = [bracket_factions[i] for i in np.argsort(-sort_values, kind='stable')]
+        with profile.stage("heatmap figure"):
+            heatmap = faction_matrix.heatmap(ordered)
+        with profile.stage("heatmap chart"):
+            st.plotly_chart(heatmap, use_container_width=True)
+
+    st.sidebar.markdown("---")
+    st.sidebar.caption("Faction data aggregated from member statistics")
+    profile.finish()
+    st.stop()
+
 col1, col2 = st.sidebar.columns(2)
 with col1:
     left_faction = st.selectbox(
@@ -248,93 +249,17 @@ with col2:
     )
 
 # --- MAIN DASHBOARD ---
-# Get data for selected factions
-left_data = df[df['Faction Name'] == left_faction].iloc[0]
-right_data = df[df['Faction Name'] == right_faction].iloc[0]
-
 # Define metrics to compare (matching your reference image)
-metrics = [
-    'Number of Members', 'attackswon', 'respectforfaction',
-    'networth', 'rankedwarhits','elo','retals', 'energydrinkused',
-    'boostersused', 'lsdtaken', 'xantaken', 'booksread',
-    'statenhancersused','refills', 'alcoholused', 'candyused',
-    'bs_estimate', 'bss_public'
-]
+metrics = faction_matrix.metrics
 
-# Format values with appropriate units
-def format_value(val, metric):
-    if metric == 'networth':
-        return f"${val/1e9:,.1f}B" if val >= 1e9 else f"${val/1e6:,.1f}M"
-    elif val >= 1e6:
-        return f"{val/1e6:,.1f}M"
-    elif val >= 1e3:
-        return f"{val/1e3:,.0f}K"
-    return f"{val:,.0f}"
-
-# Create PERCENTAGE-BASED tornado chart
-fig = go.Figure()
-
-# Calculate percentages (normalized to the maximum value for each metric)
-max_values = [max(abs(left_data[m]), abs(right_data[m])) for m in metrics]
-total_values = [abs(left_data[m]) + abs(right_data[m]) for m in metrics]
-percentages_left = [-100 * left_data[m] / (total if total != 0 else 1) for m, total in zip(metrics, total_values)]
-percentages_right = [100 * right_data[m] / (total if total != 0 else 1) for m, total in zip(metrics, total_values)]
-
-# Add left faction bars (negative percentages)
-fig.add_trace(go.Bar(
-    y=metrics,
-    x=percentages_left,
-    name=left_faction,
-    orientation='h',
-    marker_color='#1f77b4',
-    text=[format_value(left_data[m], m) for m in metrics],
-    textposition='outside',
-    textfont=dict(size=10),
-    width=0.6
-))
-
-# Add right faction bars (positive percentages)
-fig.add_trace(go.Bar(
-    y=metrics,
-    x=percentages_right,
-    name=right_faction,
-    orientation='h',
-    marker_color='#ff7f0e',
-    text=[format_value(right_data[m], m) for m in metrics],
-    textposition='outside',
-    textfont=dict(size=10),
-    width=0.6
-))
-
-# Update layout for percentage tornado effect
-fig.update_layout(
-    title=f"<b>{left_faction} vs {right_faction}</b> - Percentage Comparison",
-    barmode='relative',
-    height=max(600, 35 * len(metrics)),
-    margin=dict(l=220, r=50, b=100, t=80, pad=10),
-    xaxis=dict(
-        title='Percentage of Maximum Value',
-        tickvals=[-100, -75, -50, -25, 0, 25, 50, 75, 100],
-        ticktext=['100%', '75%', '50%', '25%', '0', '25%', '50%', '75%', '100%'],
-        range=[-105, 105],
-        showgrid=True,
-        zeroline=True,
-        zerolinewidth=2,
-        zerolinecolor='black'
-    ),
-    yaxis=dict(
-        autorange='reversed',
-        automargin=True,
-        tickfont=dict(size=11),
-        title=None
-    ),
-    uniformtext_minsize=8,
-    uniformtext_mode='hide',
-    bargap=0.4
-)
+# Create PERCENTAGE-BASED tornado chart (built once per faction pair and
+# snapshot, then served from the matrix's figure cache)
+with profile.stage("tornado figure"):
+    fig = faction_matrix.figure(left_faction, right_faction)
 
 # Display the percentage-based chart
-st.plotly_chart(fig, use_container_width=True)
+with profile.stage("tornado chart"):
+    st.plotly_chart(fig, use_container_width=True)
 
 # --- METRIC COMPARISON TABLE ---
 st.subheader("Detailed Metrics Comparison")
@@ -342,8 +267,8 @@ st.subheader("Detailed Metrics Comparison")
 # Create comparison table
 comparison_table = pd.DataFrame({
     'Metric': metrics,
-    left_faction: [format_value(left_data[m], m) for m in metrics],
-    right_faction: [format_value(right_data[m], m) for m in metrics]
+    left_faction: faction_matrix.labels(left_faction),
+    right_faction: faction_matrix.labels(right_faction)
 })
 
 # Simplified styling approach
@@ -367,20 +292,58 @@ def style_table():
 # Apply styling
 styled_table = comparison_table.style.set_table_styles(style_table())
 
-# Display table
-st.dataframe(
-    styled_table,
-    column_config={
-        "Metric": st.column_config.TextColumn("Metric", width="medium"),
-        left_faction: st.column_config.TextColumn(left_faction, width="small"),
-        right_faction: st.column_config.TextColumn(right_faction, width="small")
-    },
-    hide_index=True,
-    use_container_width=True
+with profile.stage("comparison table"):
+    # Display table
+    st.dataframe(
+        styled_table,
+        column_config={
+            "Metric": st.column_config.TextColumn("Metric", width="medium"),
+            left_faction: st.column_config.TextColumn(left_faction, width="small"),
+            right_faction: st.column_config.TextColumn(right_faction, width="small")
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+
+# --- TRENDS OVER TIME ---
+st.subheader("Trends Over Time")
+
+trend_metric = st.selectbox(
+    "Select Metric for Trend",
+    options=['bs_estimate', 'rankedwarhits', 'elo'],
+    index=0
 )
 
+# Reads only the two factions and one metric from the snapshot history
+with profile.stage("history read"):
+    trend = faction_history([left_faction, right_faction], [trend_metric])
+
+if trend['taken_at'].nunique() < 2:
+    st.info("Trends appear once at least two data snapshots have been recorded")
+else:
+    trend_fig = go.Figure()
+    for faction, color in [(left_faction, '#1f77b4'), (right_faction, '#ff7f0e')]:
+        faction_trend = trend[trend['Faction Name'] == faction]
+        trend_fig.add_trace(go.Scatter(
+            x=faction_trend['taken_at'],
+            y=faction_trend[trend_metric],
+            name=faction,
+            mode='lines+markers',
+            line=dict(color=color)
+        ))
+    trend_fig.update_layout(
+        title=f"<b>{left_faction} vs {right_faction}</b> - {trend_metric} Over Time",
+        xaxis_title='Snapshot',
+        yaxis_title=trend_metric,
+        hovermode='x unified'
+    )
+    with profile.stage("trend chart"):
+        st.plotly_chart(trend_fig, use_container_width=True)
+
 # --- FOOTER ---
 st.sidebar.markdown("---")
 st.sidebar.caption("Faction data aggregated from member statistics")
 
+profile.finish()
+
 
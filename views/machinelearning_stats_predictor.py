@@ -1,3 +1,135 @@
 import streamlit as st
+import pandas as pd
+import plotly.express as px
 
-st.write("Loading Page...Try again another time")
\ No newline at end of file
+from torn.aggregate import aggregate, plain_labels
+from torn.data import get_snapshot
+from torn.predict import TrainingDataError, load_or_train, load_report
+from torn.profiling import RerunProfile
+
+st.title("🤖 Battlestats Predictor")
+
+# Named stage timings for this rerun (logged, and shown in the sidebar on request)
+profile = RerunProfile("machinelearning_stats_predictor")
+
+# --- LOAD DATA ---
+with profile.stage("load snapshot"):
+    snapshot = get_snapshot()
+df = snapshot.members
+
+# --- MODEL AND PREDICTIONS ---
+# Loaded from the artifact written by `python -m torn.train` the first time
+# this page is opened (a quick single fit if there is none yet); every member
+# is predicted in one call and the faction totals follow from that
+@st.cache_resource(show_spinner="Predicting battlestats...", max_entries=1)
+def snapshot_predictions(_snapshot, key):
+    members = _snapshot.members
+    model = load_or_train(members, key)
+    predicted = model.predict(members)
+    faction_totals = plain_labels(aggregate(
+        members.assign(predicted_bs=predicted),
+        "Faction Name",
+        {"Member Name": "count", "bs_estimate": "sum", "predicted_bs": "sum"}
+    )).sort_values("predicted_bs", ascending=False, ignore_index=True)
+    return model, predicted, faction_totals
+
+with profile.stage("predictions"):
+    try:
+        model, predicted, faction_totals = snapshot_predictions(snapshot, snapshot.key)
+    except TrainingDataError as exc:
+        # e.g. a table from torn.ingest without third-party estimates
+        st.info(f"No battlestats model for this data: {exc}.")
+        profile.finish()
+        st.stop()
+
+# --- MODEL SUMMARY ---
+st.subheader("Model")
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Fit (R², log scale)", f"{model.metrics.get('r2_log', float('nan')):.2f}")
+with col2:
+    st.metric("Typical Miss", f"×{model.metrics.get('median_factor', float('nan')):.1f}")
+with col3:
+    st.metric("Members Predicted", f"{len(predicted):,}")
+st.caption(
+    "Ridge regression on log-scaled personal stats, scored on members held out of the fit. "
+    "A typical miss of ×2 means half the predictions are within a factor of two of the estimate."
+)
+
+report = load_report(snapshot.key)
+if report:
+    with st.expander(f"Cross-validation ({report['trained_at']}, alpha = {report['alpha']:g})"):
+        st.dataframe(
+            pd.DataFrame(report["candidates"]).drop(columns="folds"),
+            column_config={
+                "alpha": "Alpha",
+                "r2_log": st.column_config.NumberColumn("R² (log)", format="%.4f"),
+                "r2_log_std": st.column_config.NumberColumn("R² Std", format="%.4f"),
+                "median_factor": st.column_config.NumberColumn("Typical Miss", format="×%.2f")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+tab1, tab2 = st.tabs(["🏆 Factions", "🔍 Player Lookup"])
+
+with tab1:
+    st.subheader("Predicted Faction Battlestats")
+    with profile.stage("faction chart"):
+        top_factions = faction_totals.head(20)
+        fig = px.bar(
+            top_factions.melt(
+                id_vars="Faction Name",
+                value_vars=["predicted_bs", "bs_estimate"],
+                var_name="Source",
+                value_name="Battlestats"
+            ).replace({"Source": {"predicted_bs": "Predicted", "bs_estimate": "BS Estimate"}}),
+            x="Faction Name",
+            y="Battlestats",
+            color="Source",
+            barmode="group",
+            title="Top 20 Factions by Predicted Total Battlestats"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(
+        faction_totals,
+        column_config={
+            "Faction Name": "Faction",
+            "Member Name": st.column_config.NumberColumn("Members", format="%d"),
+            "bs_estimate": st.column_config.NumberColumn("BS Estimate", format="%d"),
+            "predicted_bs": st.column_config.NumberColumn("Predicted BS", format="%d")
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+
+with tab2:
+    st.subheader("Player Lookup")
+    player_search = st.text_input("Search Players:")
+
+    if player_search:
+        with profile.stage("player lookup"):
+            # Name index search plus a gather from the precomputed predictions
+            rows = snapshot.name_index.search(player_search)[:25]
+            matches = plain_labels(df.take(rows)[["Member Name", "Faction Name", "Rank & Division", "bs_estimate", "bs_estimate_human"]])
+            matches["Predicted BS"] = predicted[rows]
+
+        if len(matches):
+            st.dataframe(
+                matches,
+                column_config={
+                    "Member Name": "Player",
+                    "Faction Name": "Faction",
+                    "Rank & Division": "Rank & Division",
+                    "bs_estimate": st.column_config.NumberColumn("BS Estimate", format="%d"),
+                    "bs_estimate_human": "BS Estimate (Human)",
+                    "Predicted BS": st.column_config.NumberColumn("Predicted BS", format="%d")
+                },
+                hide_index=True,
+                use_container_width=True
+            )
+        else:
+            st.info(f"No players matching '{player_search}'")
+
+profile.finish()
@@ -344,23 +344,26 @@ import pandas as pd
 import plotly.express as px
 import numpy as np
 
+from torn.aggregate import FACTION_STATS_AGG
+from torn.cache import filter_key
+from torn.data import get_snapshot, plain_labels
+from torn.paging import page_count, page_slice, selection_mask, sorted_rows, top_rows
+from torn.profiling import RerunProfile
+from torn.ranks import RANK_SCOPES
+from torn.styling import highlight_cells
+
 st.title("⚔️ Torn Faction Dashboard")
 
-# --- LOAD DATA ---
-@st.cache_data
-def load_data():
-    df = pd.read_excel('assets/RW_Factions.xlsx', sheet_name='RW_Factions')
-    # Clean numerical columns
-    df['networth'] = pd.to_numeric(df['networth'], errors='coerce')
-    df['bss_public'] = pd.to_numeric(df['bss_public'], errors='coerce')
-    df['elo'] = pd.to_numeric(df['elo'], errors='coerce')
-    
-    # Combine Rank Name and Division at the start
-    df['Rank & Division'] = df['Rank Name'].astype(str) + ' ' + df['Division'].astype(str)
-    
-    return df
+# Named stage timings for this rerun (logged, and shown in the sidebar on request)
+profile = RerunProfile("torn_dashboard")
 
-df = load_data()
+# --- LOAD DATA ---
+# Shared with the other pages; 'Rank & Division' is already derived
+with profile.stage("load snapshot"):
+    snapshot = get_snapshot()
+df = snapshot.members
+filter_index = snapshot.filter_index
+profile.watch_cache("view", snapshot.view_cache)
 
 # --- SIDEBAR FILTERS ---
 st.sidebar.header("Filters")
@@ -382,39 +385,106 @@ selected_factions = st.sidebar.multiselect(
 # Player Name Search (supports partial matching)
 player_search = st.sidebar.text_input("Search Players:")
 
-# Number of Members Slider
+# Number of Members Slider (faction sizes are precomputed per snapshot)
+faction_sizes = filter_index.faction_sizes
 min_members, max_members = st.sidebar.slider(
     "Number of Members Range:",
-    min_value=int(df.groupby("Faction Name")["Member Name"].count().min()),
-    max_value=int(df.groupby("Faction Name")["Member Name"].count().max()),
-    value=(1, int(df.groupby("Faction Name")["Member Name"].count().max()))
+    min_value=int(faction_sizes.min()),
+    max_value=int(faction_sizes.max()),
+    value=(1, int(faction_sizes.max()))
 )
 
 # --- DYNAMIC FILTERING ---
-filtered_df = df.copy()
-
-# Apply Rank & Division filter
-if selected_rank_division:
-    filtered_df = filtered_df[filtered_df["Rank & Division"].isin(selected_rank_division)]
-
-# Apply faction filter
-if selected_factions:
-    filtered_df = filtered_df[filtered_df["Faction Name"].isin(selected_factions)]   
+# Comparison table columns (name, members, rank/division, then metrics)
+comparison_cols = [
+    'Faction Name', 
+    'Member Name',
+    'Rank & Division',
+    'attackswon',
+    'rankedwarhits',
+    'retals',
+    'elo',
+    'bs_estimate',
+    'bss_public',
+    'networth',
+    'xantaken',
+    'lsdtaken',
+    'statenhancersused',
+    'boostersused',
+    'refills',
+    'rankedwarringwins',
+    'useractivity'
+]
+
+# Format values with thousand separators and no decimals
+def format_number(x):
+    if pd.api.types.is_number(x):
+        return f"{x:,.0f}"
+    return x
+
+def build_view():
+    # Work on row positions and only build the filtered frame when needed
+    with profile.stage("filters"):
+        rows, fuzzy = snapshot.query.filter_rows(
+            snapshot.name_index,
+            selected_rank_division, selected_factions, player_search,
+            (min_members, max_members)
+        )
 
-# Apply player name filter
-if player_search:
-    filtered_df = filtered_df[filtered_df["Member Name"].str.contains(player_search, case=False, na=False)]
+    # Prepare faction-level data with all requested metrics (one vectorised
+    # pass over the filtered row positions, modal rank included)
+    with profile.stage("aggregation"):
+        faction_stats = snapshot.query.aggregate("Faction Name", FACTION_STATS_AGG, rows=rows)
+    
+    with profile.stage("scatter figure"):
+        # Factions without any public BSS (e.g. freshly ingested members) get
+        # no bubble instead of failing the whole chart
+        fig = px.scatter(
+            faction_stats.fillna({"bss_public": 0}),
+            x="elo",
+            y="Member Name",
+            size="bss_public",
+            color="Faction Name",
+            hover_name="Faction Name",
+            hover_data={"networth": ":$,.0f"},
+            size_max=30,
+            labels={
+                "elo": "Average ELO Rating",
+                "Member Name": "Number of Members",
+                "bss_public": "BSS Public Score"
+            },
+            title="Faction Comparison: Size = BSS, X = Avg ELO, Y = Members"
+        )
 
-# Apply member count filter
-faction_counts = filtered_df.groupby("Faction Name")["Member Name"].count()
-valid_factions = faction_counts[
-    (faction_counts >= min_members) & 
-    (faction_counts <= max_members)
-].index
-filtered_df = filtered_df[filtered_df["Faction Name"].isin(valid_factions)]
+    with profile.stage("table formatting"):
+        comparison_df = faction_stats[comparison_cols].copy()
+        display_df = comparison_df.copy()
+        for col in comparison_cols[3:]:  # Skip first 3 columns (name, members, rank/division)
+            if pd.api.types.is_numeric_dtype(display_df[col]):
+                display_df[col] = display_df[col].apply(format_number)
+
+    return {
+        "rows": rows,
+        "fuzzy": fuzzy,
+        "faction_stats": faction_stats,
+        "scatter": fig,
+        "comparison_df": comparison_df,
+        "display_df": display_df,
+    }
+
+# Identical sidebar states (from any session) are served from the snapshot's LRU cache
+filter_state = filter_key(selected_rank_division, selected_factions, player_search, (min_members, max_members))
+view = snapshot.view_cache.get_or_compute(filter_state, build_view)
+
+rows = view["rows"]
+faction_stats = view["faction_stats"]
+with profile.stage("filtered frame"):
+    filtered_df = df.take(rows)
+if view["fuzzy"]:
+    st.sidebar.caption(f"No exact matches for '{player_search}', showing close matches")
 
 # --- MAIN DASHBOARD LAYOUT ---
-tab1, tab2 = st.tabs(["🏆 Overview", "📊 Stats"])
+tab1, tab2, tab3 = st.tabs(["🏆 Overview", "📊 Stats", "🎯 Player Standing"])
 
 with tab1:
     # Key Metrics
@@ -422,7 +492,7 @@ with tab1:
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Filtered Factions", filtered_df["Faction Name"].nunique())
+        st.metric("Filtered Factions", len(faction_stats))
     with col2:
         st.metric("Filtered Members", len(filtered_df))
     with col3:
@@ -434,44 +504,8 @@ with tab1:
 
     # Scatterplot for factions
     st.subheader("Faction Comparison")
-    
-    # Prepare faction-level data with all requested metrics
-    faction_stats = filtered_df.groupby("Faction Name").agg({
-        'Member Name': 'count',
-        'Rank & Division': lambda x: str(x.mode()[0]) if not x.empty else '',
-        'attackswon': 'sum',
-        'rankedwarhits': 'sum',
-        'retals': 'sum',
-        'elo': 'mean',
-        'bs_estimate': 'sum',
-        'bss_public': 'mean',
-        'networth': 'sum',
-        'xantaken': 'sum',
-        'lsdtaken': 'sum',
-        'statenhancersused': 'sum',
-        'boostersused': 'sum',
-        'refills': 'sum',
-        'rankedwarringwins': 'sum',
-        'useractivity': 'sum'
-    }).reset_index()
-    
-    fig = px.scatter(
-        faction_stats,
-        x="elo",
-        y="Member Name",
-        size="bss_public",
-        color="Faction Name",
-        hover_name="Faction Name",
-        hover_data={"networth": ":$,.0f"},
-        size_max=30,
-        labels={
-            "elo": "Average ELO Rating",
-            "Member Name": "Number of Members",
-            "bss_public": "BSS Public Score"
-        },
-        title="Faction Comparison: Size = BSS, X = Avg ELO, Y = Members"
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    with profile.stage("scatter chart"):
+        st.plotly_chart(view["scatter"], use_container_width=True)
     
     # --- FACTION COMPARISON TABLE WITH CONDITIONAL FORMATTING ---
     st.subheader("Faction Performance Comparison")
@@ -485,92 +519,84 @@ with tab1:
     # Get reference values
     ref_values = faction_stats[faction_stats["Faction Name"] == reference_faction].iloc[0]
     
-    # Prepare comparison table with all requested columns
-    comparison_cols = [
-        'Faction Name', 
-        'Member Name',
-        'Rank & Division',
-        'attackswon',
-        'rankedwarhits',
-        'retals',
-        'elo',
-        'bs_estimate',
-        'bss_public',
-        'networth',
-        'xantaken',
-        'lsdtaken',
-        'statenhancersused',
-        'boostersused',
-        'refills',
-        'rankedwarringwins',
-        'useractivity'
-    ]
-    
-    comparison_df = faction_stats[comparison_cols].copy()
-    
-    # Format values with thousand separators and no decimals
-    def format_number(x):
-        if pd.api.types.is_number(x):
-            return f"{x:,.0f}"
-        return x
-    
-    display_df = comparison_df.copy()
-    for col in comparison_cols[3:]:  # Skip first 3 columns (name, members, rank/division)
-        if pd.api.types.is_numeric_dtype(display_df[col]):
-            display_df[col] = display_df[col].apply(format_number)
-    
-    # Function to apply conditional formatting
-    def highlight_cells(row):
-        styles = []
-        for col in comparison_cols:
-            if col in ['Faction Name', 'Rank & Division']:
-                styles.append('')  # No styling for these columns
-                continue
-                
-            # Get numeric values from original df (remove formatting if any)
-            try:
-                cell_val = float(comparison_df.loc[row.name, col])
-                ref_val = float(ref_values[col])
-            except:
-                styles.append('')
-                continue
-            
-            if cell_val > ref_val:
-                styles.append('background-color: #ff7d7d')  # Red for higher
-            elif cell_val < ref_val:
-                styles.append('background-color: #90ee90')  # Green for lower
-            else:
-                styles.append('')
-        return styles
+    # Conditional formatting: the whole faction x metric block is compared
+    # against the reference row at once (red = higher, green = lower)
+    with profile.stage("highlight"):
+        cell_styles = highlight_cells(view["comparison_df"], ref_values, skip_cols=['Faction Name', 'Rank & Division'])
     
     # Apply styling to the display dataframe
-    styled_df = display_df.style.apply(highlight_cells, axis=1)
+    styled_df = view["display_df"].style.apply(lambda _: cell_styles, axis=None)
+    
+    # Column labels, shared with the similar-factions table
+    comparison_config = {
+        "Faction Name": "Faction",
+        "Member Name": "Members",
+        "Rank & Division": "Rank & Division",
+        "attackswon": "Attacks Won",
+        "rankedwarhits": "Ranked War Hits",
+        "retals": "Retaliations",
+        "elo": "Avg ELO",
+        "bs_estimate": "BS Estimate",
+        "bss_public": "Avg BSS Public",
+        "networth": "Total Net Worth",
+        "xantaken": "Xanax Taken",
+        "lsdtaken": "LSD Taken",
+        "statenhancersused": "Stat Enhancers",
+        "boostersused": "Boosters Used",
+        "refills": "Refills",
+        "rankedwarringwins": "Ranked War Wins",
+        "useractivity": "User Activity"
+    }
+    
+    # Display table with column configurations (the styler is computed and
+    # serialised here)
+    with profile.stage("comparison table"):
+        st.dataframe(
+            styled_df,
+            column_config=comparison_config,
+            hide_index=True,
+            use_container_width=True
+        )
     
-    # Display table with column configurations
-    st.dataframe(
-        styled_df,
-        column_config={
-            "Faction Name": "Faction",
-            "Member Name": "Members",
-            "Rank & Division": "Rank & Division",
-            "attackswon": "Attacks Won",
-            "rankedwarhits": "Ranked War Hits",
-            "retals": "Retaliations",
-            "elo": "Avg ELO",
-            "bs_estimate": "BS Estimate",
-            "bss_public": "Avg BSS Public",
-            "networth": "Total Net Worth",
-            "xantaken": "Xanax Taken",
-            "lsdtaken": "LSD Taken",
-            "statenhancersused": "Stat Enhancers",
-            "boostersused": "Boosters Used",
-            "refills": "Refills",
-            "rankedwarringwins": "Ranked War Wins",
-            "useractivity": "User Activity"
-        },
-        hide_index=True,
-        use_container_width=True
-    )
+    # --- SIMILAR FACTIONS ---
+    st.subheader("Similar Factions")
+    
+    # Nearest neighbours over every faction's stats in the snapshot (not just
+    # the filtered members), closest first
+    neighbours = snapshot.faction_neighbours
+    faction_options = sorted(neighbours.row_of)
+    similar_col, count_col = st.columns([3, 1])
+    with similar_col:
+        similar_to = st.selectbox(
+            "Find factions similar to:",
+            options=faction_options,
+            index=faction_options.index(reference_faction) if reference_faction in neighbours.row_of else 0
+        )
+    with count_col:
+        n_similar = st.number_input("Neighbours:", min_value=1, max_value=50, value=10)
+    only_filtered = st.checkbox("Only factions in the current filters", value=False)
+    
+    if similar_to is not None:
+        with profile.stage("similar factions"):
+            similar = neighbours.nearest(
+                similar_to, n_similar,
+                candidates=faction_stats["Faction Name"] if only_filtered else None
+            )
+            similar_display = similar[["Faction Name", "Distance", *comparison_cols[1:]]].copy()
+            for col in comparison_cols[3:]:
+                if pd.api.types.is_numeric_dtype(similar_display[col]):
+                    similar_display[col] = similar_display[col].apply(format_number)
+        
+        st.dataframe(
+            similar_display,
+            column_config={
+                **comparison_config,
+                "Distance": st.column_config.NumberColumn("Distance", format="%.2f")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+        st.caption("Distance is the typical gap per metric in standard deviations of the log-scaled stats; 0 is identical.")
 
 with tab2:
     st.subheader("Member Performance Dashboard")
@@ -591,77 +617,178 @@ with tab2:
         default=default_kpis
     )
     
+    # One faceted figure means one Plotly payload instead of one per KPI
+    single_chart = st.toggle("Show top members in a single chart", value=False)
+    
     if kpi_cols:
         # Create bar charts for numeric KPIs (exclude bs_estimate_human and last_updated)
         numeric_kpis = [kpi for kpi in kpi_cols if kpi not in ['bs_estimate_human', 'last_updated']]
         
-        for kpi in numeric_kpis:
-            # Get top 10 members for this KPI
-            top_members = filtered_df.nlargest(10, kpi)[['Member Name', 'Faction Name', 'Rank & Division', kpi]]
+        with profile.stage("top members charts"):
+            selected = selection_mask(rows, len(df))
+            top_frames = []
+            for kpi in numeric_kpis:
+                # Top 10 members for this KPI: the first filtered rows in the
+                # snapshot's descending order (ties keep sheet order, missing last)
+                top_idx = top_rows(snapshot.orderings.order(kpi, descending=True), selected, 10)
+                top_members = df.take(top_idx)[['Member Name', 'Faction Name', 'Rank & Division', kpi]]
+                top_members = plain_labels(top_members[top_members[kpi].notna()])
+                
+                if single_chart:
+                    top_frames.append(
+                        top_members.rename(columns={kpi: 'Value'}).assign(KPI=kpi.replace('_', ' ').title())
+                    )
+                    continue
             
-            fig = px.bar(
-                top_members,
-                x='Member Name',
-                y=kpi,
-                color='Faction Name',
-                title=f"Top 10 Members by {kpi.replace('_', ' ').title()}",
-                labels={kpi: kpi.replace('_', ' ').title()},
-                hover_data=['Rank & Division']
-            )
-            st.plotly_chart(fig, use_container_width=True)
+                fig = px.bar(
+                    top_members,
+                    x='Member Name',
+                    y=kpi,
+                    color='Faction Name',
+                    title=f"Top 10 Members by {kpi.replace('_', ' ').title()}",
+                    labels={kpi: kpi.replace('_', ' ').title()},
+                    hover_data=['Rank & Division']
+                )
+                st.plotly_chart(fig, use_container_width=True)
+            
+            if top_frames:
+                fig = px.bar(
+                    pd.concat(top_frames, ignore_index=True),
+                    x='Member Name',
+                    y='Value',
+                    color='Faction Name',
+                    facet_row='KPI',
+                    title="Top 10 Members by KPI",
+                    hover_data=['Rank & Division'],
+                    height=300 * len(top_frames)
+                )
+                # Every KPI has its own members and scale
+                fig.update_xaxes(matches=None, showticklabels=True)
+                fig.update_yaxes(matches=None, title_text='')
+                fig.for_each_annotation(lambda a: a.update(text=a.text.split('=')[-1]))
+                st.plotly_chart(fig, use_container_width=True)
         
         # Member table with proper formatting
         st.subheader("Member KPIs")
         
-        # Create display copy
-        display_members = filtered_df.copy()
-        
-        # Format numeric columns with thousand separators
-        numeric_cols = [col for col in kpi_cols if col not in ['bs_estimate_human', 'last_updated']]
-        
-        for col in numeric_cols:
-            if col == 'networth':
-                display_members[col] = display_members[col].apply(
-                    lambda x: f"${x:,.0f}" if pd.notnull(x) else 'N/A'
-                )
-            else:
-                display_members[col] = display_members[col].apply(
-                    lambda x: f"{x:,.0f}" if pd.notnull(x) else 'N/A'
+        with profile.stage("member table"):
+            table_cols = ['Member Name', 'Faction Name', 'Rank & Division', *kpi_cols]
+            
+            # Sorting and paging happen here so only the visible page is sent
+            # to the browser; values stay numeric and are formatted by the
+            # column configuration
+            sort_col, order_col, size_col, pct_col, page_col = st.columns([3, 2, 2, 2, 2])
+            with sort_col:
+                sort_by = st.selectbox("Sort by:", options=["Sheet order", *table_cols], index=0)
+            with order_col:
+                descending = st.toggle("Descending", value=True)
+            with size_col:
+                page_size = st.selectbox("Rows per page:", options=[25, 50, 100, 250], index=1)
+            with pct_col:
+                percentile_scope = st.selectbox("Percentiles within:", options=["Off", *RANK_SCOPES], index=0)
+            
+            order = None if sort_by == "Sheet order" else snapshot.orderings.order(sort_by, descending)
+            member_rows = sorted_rows(order, rows, len(df))
+            
+            with page_col:
+                page = st.number_input(
+                    "Page:",
+                    min_value=1,
+                    max_value=page_count(len(member_rows), page_size),
+                    value=1
                 )
-        
-        # Configure column display
-        column_config = {
-            "Member Name": "Player",
-            "Faction Name": "Faction",
-            "Rank & Division": "Rank & Division",
-            "attackswon": "Attacks Won",
-            "networth": "Net Worth",
-            "bs_estimate_human": "BS Estimate",
-            "bss_public": "BSS Public",
-            "respectforfaction": "Respect",
-            "boostersused": "Boosters Used",
-            "energydrinkused": "Energy Drinks",
-            "drugsused": "Drugs Taken",
-            "refills": "Refills",
-            "alcoholused": "Alcohol Used",
-            "candyused": "Candy Used",
-            "booksread": "Books Read",
-            "rankedwarhits": "Ranked War Hits",
-            "rankedwarringwins": "Ranked War Wins",
-            "useractivity": "User Activity",
-            "last_updated": "Last Updated"
-        }
-        
-        # Display member table
-        st.dataframe(
-            display_members[['Member Name', 'Faction Name', 'Rank & Division', *kpi_cols]],
-            column_config=column_config,
-            hide_index=True,
-            use_container_width=True
-        )
+            page_rows = page_slice(member_rows, page, page_size)
+            
+            # Configure column display (printf formats, no string conversion)
+            column_config = {
+                "Member Name": "Player",
+                "Faction Name": "Faction",
+                "Rank & Division": "Rank & Division",
+                "attackswon": st.column_config.NumberColumn("Attacks Won", format="%d"),
+                "networth": st.column_config.NumberColumn("Net Worth", format="$%d"),
+                "bs_estimate_human": "BS Estimate",
+                "bss_public": st.column_config.NumberColumn("BSS Public", format="%d"),
+                "respectforfaction": st.column_config.NumberColumn("Respect", format="%d"),
+                "boostersused": st.column_config.NumberColumn("Boosters Used", format="%d"),
+                "energydrinkused": st.column_config.NumberColumn("Energy Drinks", format="%d"),
+                "drugsused": st.column_config.NumberColumn("Drugs Taken", format="%d"),
+                "refills": st.column_config.NumberColumn("Refills", format="%d"),
+                "alcoholused": st.column_config.NumberColumn("Alcohol Used", format="%d"),
+                "candyused": st.column_config.NumberColumn("Candy Used", format="%d"),
+                "booksread": st.column_config.NumberColumn("Books Read", format="%d"),
+                "rankedwarhits": st.column_config.NumberColumn("Ranked War Hits", format="%d"),
+                "rankedwarringwins": st.column_config.NumberColumn("Ranked War Wins", format="%d"),
+                "useractivity": st.column_config.NumberColumn("User Activity", format="%d"),
+                "last_updated": "Last Updated"
+            }
+            
+            page_df = plain_labels(df.take(page_rows)[table_cols])
+            if percentile_scope != "Off":
+                # Precomputed per snapshot, so only the visible page is gathered;
+                # each percentile sits next to its KPI
+                ordered_cols = []
+                for col in table_cols:
+                    ordered_cols.append(col)
+                    if col in snapshot.ranks.kpis:
+                        pct_name = f"{col} pct"
+                        page_df[pct_name] = snapshot.ranks.percentiles(col, percentile_scope, page_rows)
+                        label = column_config[col] if isinstance(column_config[col], str) else column_config[col]["label"]
+                        column_config[pct_name] = st.column_config.ProgressColumn(
+                            f"{label} %ile", min_value=0, max_value=100, format="%.0f"
+                        )
+                        ordered_cols.append(pct_name)
+                page_df = page_df[ordered_cols]
+            
+            # Display the current page of the member table
+            st.dataframe(
+                page_df,
+                column_config=column_config,
+                hide_index=True,
+                use_container_width=True
+            )
+            if len(member_rows):
+                first = (page - 1) * page_size + 1
+                st.caption(f"Showing members {first:,}–{first + len(page_rows) - 1:,} of {len(member_rows):,}")
     else:
         st.warning("Please select at least one KPI to display")
 
+with tab3:
+    st.subheader("Player Standing")
+    st.caption("Rank and percentile on every KPI among all members, within the player's faction and within their Rank & Division (1 = highest).")
+    standing_search = st.text_input("Find a player:", key="standing_search")
+    
+    if standing_search:
+        standing_rows = snapshot.name_index.search(standing_search)[:25]
+        if len(standing_rows):
+            player_row = st.selectbox(
+                "Player:",
+                options=standing_rows.tolist(),
+                format_func=lambda row: f"{df['Member Name'].iat[row]} [{df['Faction Name'].iat[row]}] - {df['Rank & Division'].iat[row]}"
+            )
+            with profile.stage("player standing"):
+                standing = snapshot.ranks.player(player_row)
+                standing["KPI"] = standing["KPI"].str.replace('_', ' ').str.title()
+            
+            percentile_config = {
+                f"{scope} Percentile": st.column_config.ProgressColumn(
+                    f"{scope} %ile", min_value=0, max_value=100, format="%.1f"
+                )
+                for scope in RANK_SCOPES
+            }
+            st.dataframe(
+                standing,
+                column_config={
+                    "Value": st.column_config.NumberColumn("Value", format="%d"),
+                    **percentile_config
+                },
+                hide_index=True,
+                use_container_width=True
+            )
+        else:
+            st.info(f"No players matching '{standing_search}'")
+
 # --- FOOTER ---
 st.sidebar.markdown("---")
-st.sidebar.caption(f"Data updated: {df['last_updated'].max()}")
\ No newline at end of file
+st.sidebar.caption(f"Data updated: {df['last_updated'].max()} (snapshot v{snapshot.version})")
+
+profile.finish()
\ No newline at end of file